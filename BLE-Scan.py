@@ -72,17 +72,20 @@ Disclaimer:
 This script is provided "as is", without warranty of any kind, express or implied.
 """
 import asyncio
-from bleak import BleakScanner
+from meshcom_discovery import NodeRegistry, stream_nodes
 
 async def scan_ble_devices():
-  print("Please give me a second to complete bluetooth scan for MC-* ..")
-  devices = await BleakScanner.discover()
-  for device in devices:
-    if device.name.startswith("MC-"):
-      print(f"Device {device.name}, Address: {device.address}, RSSI: {device._rssi}")
+  print("Scanning for MeshCom nodes (Nordic UART Service) ..")
+  #jeder Node wird ausgegeben, sobald er auftaucht, nicht erst nach dem ganzen Scan
+  #gefundene Nodes landen in der Registry, MeshCom-Read/-Write finden sie dann ohne Scan
+  registry = NodeRegistry()
+  async for address, name, rssi in stream_nodes():
+    registry.seen(address, name, rssi)
+    print(f"Device {name or '?'}, Address: {address}, RSSI: {rssi}")
+  registry.save()
 
 # Run the BLE scan
 #loop = asyncio.get_event_loop()
 #loop.run_until_complete(scan_ble_devices())
 
-asyncio.run(scan_ble_devices())
\ No newline at end of file
+asyncio.run(scan_ble_devices())
@@ -19,6 +19,8 @@ This is an educational script, that helps to understand of how to communicate to
 MeshCom node tested against:
 	running on a RaspberryPi 5, with 8GB RAM and Debian Bookwork
 
+Mit MESHCOM_METRICS_PORT gibt es Metriken im Prometheus Format (meshcom_metrics.py), wie beim Dienst und Gateway.
+
 If you CRTL + c the script, be sure to reset the bluetooth stack with:
 sudo systemctl restart bluetooth 
 
@@ -57,278 +59,217 @@ This script is provided "as is", without warranty of any kind, express or implie
 
 """
 # Code starts here
-import json
 import asyncio
-import aioconsole
-from bleak import BleakClient
-from datetime import datetime
-from struct import *
+import os
+from meshcom_pipeline import FramePipeline
+from meshcom_transport import BleTransport
+from meshcom_capture import CaptureWriter
+from meshcom_dedup import DedupCache
+from meshcom_events import TypDispatcher, session_events
+from meshcom_records import DecodeError
+from meshcom_heard import HeardTable
+from meshcom_profile import NodeProfile
+from meshcom_discovery import resolve_node
+from meshcom_sinks import SinkSet, StdoutSink
 
 #Constants
+MERGE_DELAY = 0.5 # Sekunden, so lange wird bei mehreren Nodes auf die Kopien der anderen gewartet
 write_char_uuid = "6e400002-b5a3-f393-e0a9-e50e24dcca9e" # UUID_Char_WRITE
 read_char_uuid =  "6e400003-b5a3-f393-e0a9-e50e24dcca9e" # UUID_Char_NOTIFY
 hello_byte = bytes([0x04, 0x10, 0x20, 0x30])
 
-dataFlag = False #global flag to check for new data
-
-def calc_fcs(msg):
-    fcs = 0
-    for x in range(0,len(msg)):
-        fcs = fcs + msg[x]
-    
-    # SWAP MSB/LSB
-    fcs = ((fcs & 0xFF00) >> 8) | ((fcs & 0xFF) << 8 )
-    
-    #print("calc_fcs=" + hex(fcs))
-    return fcs
-
-def notification_handler(sender, clean_msg):
-
-    # JSON-Nachrichten beginnen mit 'D{'
-    if clean_msg.startswith(b'D{'):
-
-         var = decode_json_message(clean_msg)
-
-         typ_mapping = {
-               "MH": "MHead update",
-               "SA": "APRS",
-               "G": "GPS",
-               "W": "weather",
-               "SN": "System Settings",
-               "SE": "pressure und Co sensors",
-               "SW": "Wifi ttings",
-               "I": "Info page",
-               "CONFFIN": "Habe fertig"
-         }
+#Ausgaben statt print pro Frame, geschrieben wird gesammelt im eigenen Task, siehe meshcom_sinks.py
+output = SinkSet([StdoutSink()])
 
-         try:
-           typ = var.get('TYP')
+#JSON Frames nach TYP verteilen (MH, SA, G, W, SN, SE, SW, I, CONFFIN)
+json_handlers = TypDispatcher()
 
-           #print(typ_mapping.get(var.get('TYP'), var))
+@json_handlers.register("MH")
+def on_mh(sender, var): # MH update
+  output.emit(var, sender)
 
-           if typ == 'MH': # MH update
-             print(var)
+#weitere Typen einfach registrieren, z.B.
+#@json_handlers.register("CONFFIN")
+#def on_conffin(sender, var): # Habe Fertig! Mehr gibt es nicht
+#  output.emit("Habe fertig", sender)
 
-           #elif typ == "SA": # APRS.fi Info
-           #  print("APRS")
+def output_handler(sender, clean_msg, var):
+    """Ausgabe eines Frames, var ist das Ergebnis des Decoders aus der Pipeline."""
 
-           #elif typ == "G": # GPS Info
-           #  print("GPS")
-
-           #elif typ == "W": # Wetter Info
-           #  print("Wetter")
-
-           #elif typ == "SN": # System Settings wie Buttung 
-           #  print("System Settings")
-
-           #elif typ == "SE": # System Settings wie Buttung 
-           #  print("Druck und Co Sensoren")
-
-           #elif typ == "SW": # WIFI + IP Settings
-           #  print("Wifi Settings")
-
-           #elif typ == "I": # Info Seite
-           #  print("Info Seite")
-
-           #elif typ == "CONFFIN": # Habe Fertig! Mehr gibt es nicht
-           #  print("Habe fertig")
-
-         except KeyError:
-             print(error) 
-             print(var)
+    # JSON-Nachrichten beginnen mit 'D{'
+    if clean_msg.startswith(b'D{'):
+         #kaputtes JSON kommt als DecodeError, der Grund steht im Text
+         if isinstance(var, DecodeError):
+           output.emit(var, sender)
+         else:
+           json_handlers.dispatch(sender, var)
 
     # Binärnachrichten beginnen mit '@'
     elif clean_msg.startswith(b'@'):
-      print(decode_binary_message(clean_msg))
-
-    else:
-        print("Unbekannter Nachrichtentyp.")
-
-    global dataFlag
-    dataFlag = True
-
-def decode_json_message(byte_msg):
-    try:
-        json_str = byte_msg.rstrip(b'\x00').decode("utf-8")[1:]
-        return json.loads(json_str)
-
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-        print(f"Fehler beim Dekodieren der JSON-Nachricht: {e}")
-        return None
-
-def decode_binary_message(byte_msg):
-
-    # little-endian unpack
-    raw_header = byte_msg[1:7]
-    [payload_type, msg_id, max_hop_raw] = unpack('<BIB', raw_header)
-
-    #Bits schieben
-    max_hop = max_hop_raw & 0x0F
-    mesh_info = max_hop_raw >> 4
-
-    #Frame checksum berechnen
-    calced_fcs = calc_fcs(byte_msg[1:-11])
-
-    remaining_msg = byte_msg[7:].rstrip(b'\x00')  # Alles nach Hop
-
-    if byte_msg[:2] == b'@A':  # Prüfen, ob es sich umACK Frames handel
-
-       #remaining_msg = byte_msg[8:].rstrip(b'\x00')  # Alles nach Hop
-       message = remaining_msg.hex().upper()
-
-       #Etwas bit banging, weil die Binaerdaten am Ende immer gleich aussehen
-       #[zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms ] = unpack('<BBBHBBBBI', byte_msg[-14:-1])
-       [ack_id] = unpack('<I', byte_msg[-5:-1])
-
-       json_obj = {k: v for k, v in locals().items() if k in [
-          "payload_type",
-	        "msg_id",
-	        "max_hop",
-	        "mesh_info",
-	        "message",
-	        "ack_id",
-	        "calced_fcs" ]}
-
-       return json_obj
-
-    elif bytes(byte_msg[:2]) in {b'@:', b'@!'}:
-      #remaining_msg = byte_msg[7:]  # Alles nach Hop
-      # Extrahiere den Path
-
-      split_idx = remaining_msg.find(b'>')
-      if split_idx == -1:
-        return "Kein gültiges Routing-Format"
-
-      path = remaining_msg[:split_idx+1].decode("utf-8", errors="ignore")
-      remaining_msg = remaining_msg[split_idx + 1:]
-
-      # Extrahiere Dest-Type (`dt`)
-
-      if payload_type == 58:
-        split_idx = remaining_msg.find(b':')
-      elif payload_type == 33:
-        split_idx = remaining_msg.find(b'*')+1
-      else:
-        print(f"Payload type not matched! {payload_type}")
-
-      if split_idx == -1:
-         return "Destination not found"
-
-      dest = remaining_msg[:split_idx].decode("utf-8", errors="ignore")
-
-      message = remaining_msg[split_idx:remaining_msg.find(b'\00')].decode("utf-8", errors="ignore").strip()
-
-      #Etwas bit banging, weil die Binaerdaten am Ende immer gleich aussehen
-      [zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms ] = unpack('<BBBHBBBBI', byte_msg[-14:-1])
-
-      #Frame checksum checken
-      fcs_ok = (calced_fcs == fcs)
-
-      if message.startswith(":{CET}"):
-        dest_type = "Datum & Zeit Broadcast an alle"
-      
-      elif path.startswith("response"):
-        dest_type = "user input response"
-
-      elif message.startswith("!"):
-        dest_type = "Positionsmeldung"
-
-      elif dest == "*":
-        dest_type = "Broadcast an alle"
-
-      elif dest.isdigit():
-        dest_type = f"Gruppennachricht an {dest}"
-
-      else:
-        dest_type = f"Direktnachricht an {dest}"
-
-      json_obj = {k: v for k, v in locals().items() if k in [
-          "payload_type", 
-          "msg_id",
-          "max_hop",
-          "mesh_info",
-          "dest_type",
-          "path",
-          "dest",
-          "message",
-          "hardware_id", 
-          "lora_mod", 
-          "fcs", 
-          "fcs_ok", 
-          "fw", 
-          "fw_subver", 
-          "lasthw", 
-          "time_ms",
-          "ending" 
-          ]}
-
-      return json_obj
+      output.emit(var, sender)
 
     else:
-       return "Kein gueltiges Mesh-Format"
-
-
-async def write_characteristic(client, char_uuid, data):
-  #used to sending data
-  try:
-    await client.write_gatt_char(char_uuid, data)
-    #print(f"Wrote value: {data}")
-  except Exception as e:
-    print(f"Error writing characteristic: {e}")
+        output.emit("Unbekannter Nachrichtentyp.", sender)
 
 async def user_input_task(stop_event):
     """Task to listen for user input to stop the loop."""
+    import aioconsole # erst hier, meshcom.py importiert das Modul auch ohne Konsole
+
     while not stop_event.is_set():
         user_input = await aioconsole.ainput("Enter 'q' to quit: \n")
         if user_input.strip().lower() == 'q':
             print("Stopping...")
             stop_event.set()
 
-async def run(address, loop):
+async def run(addresses, capture_file=None, db_file=None, heard_file=None, jsonl_file=None):
+  #eine Adresse oder eine Liste, alle Nodes laufen im selben Event Loop
+  if isinstance(addresses, str):
+    addresses = [addresses]
+
+  #statt MAC geht auch Name oder Rufzeichen, aufgeloest ueber die Registry von BLE-Scan.py
+  addresses = [await resolve_node(a) for a in addresses]
 
   print("trying to connect ...")
 
   stop_event = asyncio.Event()
 
-  async with BleakClient(address, loop=loop) as client:
-    # wait for BLE client to be connected
-    if client.is_connected:
-      print(f"Connected to: {address}")
-
-    #install hanlder for data collection
-    await client.start_notify(read_char_uuid, notification_handler)
-    print("handler gesetzt")
-
-    #HELLO ausgeben, damit die Kommunikation los geht
-    await write_characteristic(client, write_char_uuid, hello_byte)
-    print("HELLO sent ..")
-
-    # Start user input listener
-    asyncio.create_task(user_input_task(stop_event))
+  #optional zusaetzlich jede Ausgabe als JSON Zeile mit rx_time und Node
+  if jsonl_file:
+    from meshcom_sinks import JsonlSink
+    output.add(JsonlSink(jsonl_file))
+  await output.start()
+
+  #optional alle rohen Frames mitschreiben, abspielen mit meshcom_capture.py replay
+  recorder = CaptureWriter(capture_file) if capture_file else None
+
+  #optional alle Binaerframes in SQLite ablegen, geschrieben wird im eigenen Thread
+  store = None
+  if db_file:
+    from meshcom_store import MessageStore # sqlite3 nur laden, wenn es gebraucht wird
+    store = MessageStore(db_file)
+
+  #MHeard Tabelle, optional mit Snapshot auf der Platte, damit ein Neustart nichts vergisst
+  heard = HeardTable()
+  if heard_file:
+    print(f"MHeard: {heard.load(heard_file)} Stationen aus {heard_file}")
+
+  #MESHCOM_PROFILE=stacks oder cprofile (1 = stacks) misst jede Stufe, Ausgabe mit kill -USR1/-USR2, siehe meshcom_profiler.py
+  profiler = None
+  if os.environ.get("MESHCOM_PROFILE"):
+    from meshcom_profiler import StageProfiler, choose_sampler
+    sampler = choose_sampler(os.environ["MESHCOM_PROFILE"])
+    if sampler is not None:
+      profiler = StageProfiler(sampler=sampler)
+  if profiler is not None:
+    profiler.install()
+    profiler.install_signals(asyncio.get_running_loop())
+
+  show, heard_update = output_handler, heard.update
+  store_add = store.add if store is not None else None
+  if profiler is not None:
+    show = profiler.wrap("console", show)
+    heard_update = profiler.wrap("heard", heard_update)
+    if store_add is not None:
+      store_add = profiler.wrap("store", store_add)
+
+  #Konfig-Burst und CONFFIN aus den schon dekodierten JSON Frames, siehe meshcom_events.session_events
+  sessions = {}
+  to_session = session_events(sessions)
+
+  def dispatch(sender, clean_msg, var):
+    to_session(sender, var)
+    show(sender, clean_msg, var)
+    heard_update(var)
+    if store_add is not None:
+      store_add(var, pipeline.rx_time)
+
+  #notification -> decode -> Ausgabe, ohne Polling
+  #gleiche msg_id ueber mehrere Hops und mehrere Nodes nur einmal dekodieren und ausgeben,
+  #bei mehreren Nodes steht in rx_nodes, wer den Frame gehoert hat
+  dedup = DedupCache()
+  merge_delay = MERGE_DELAY if len(addresses) > 1 else None
+  pipeline = FramePipeline(dispatch, recorder=recorder, dedup=dedup, merge_delay=merge_delay, profiler=profiler)
+  pipeline.start()
+
+  #pro Node eine Session mit eigenem notification handler, verbindet neu und schickt HELLO selbst
+  #das Profil vom letzten Mal steht sofort bereit, der Konfig-Burst aktualisiert nur was sich geaendert hat
+  transports = [BleTransport(pipeline.feed, address, profile=NodeProfile(address)) for address in addresses]
+  sessions.update((t.address, t.session) for t in transports)
+  for t in transports:
+    if t.session.profile.cached:
+      print(f"Profil aus Cache fuer {t.address}: {t.session.profile.summary()}")
+
+  #optional Metriken, vor dem Start der Transports, damit kein Frame an den Zaehlern vorbeilaeuft
+  metrics_server = None
+  if os.environ.get("MESHCOM_METRICS_PORT"):
+    from meshcom_metrics import MetricsRegistry, MetricsServer, register_pipeline, register_links, register_sinks
+
+    registry = MetricsRegistry()
+    register_pipeline(registry, pipeline)
+    register_links(registry, sessions)
+    register_sinks(registry, output)
+    metrics_server = MetricsServer(registry, port=int(os.environ["MESHCOM_METRICS_PORT"]))
+    await metrics_server.start()
+
+  tasks = [asyncio.create_task(t.run()) for t in transports]
+  if heard_file:
+    tasks.append(asyncio.create_task(heard.run(heard_file)))
+
+  #"Connected to:" meldet die Session selbst, hier nur noch wann der Node bereit ist
+  async def announce(t):
+    await t.session.ready.wait()
+    print(f"{t.address} bereit nach {t.session.time_to_ready:.2f}s, geaendert: {t.session.profile.changed or 'nichts'}")
+
+  #ein Node, der nicht erreichbar ist, haelt die anderen nicht auf
+  tasks += [asyncio.create_task(announce(t)) for t in transports]
+
+  # Start user input listener
+  asyncio.create_task(user_input_task(stop_event))
+
+  #waiting for q + enter, die Frames laufen unabhaengig davon durch die Pipeline
+  await stop_event.wait()
+
+  for t in transports:
+    await t.close()
+  for task in tasks:
+    task.cancel()
+  await asyncio.gather(*tasks, return_exceptions=True)
+
+  await pipeline.stop(drain=False)
+  if metrics_server is not None:
+    await metrics_server.close()
+  await output.close()
+  if store is not None:
+    store.close()
+  print(pipeline.latency.summary())
+  if profiler is not None:
+    profiler.uninstall()
+    print(profiler.summary())
+  if pipeline.dropped:
+    print(f"Verworfene Frames (Queue voll): {pipeline.dropped}")
+  print(f"Duplikate: {dedup.stats()}")
+  if len(addresses) > 1:
+    print(f"Frames pro Node: {pipeline.per_sender}")
+  print(f"Gehoert in der letzten Stunde: {', '.join(s.callsign for s in heard.heard_since(3600))}")
 
-    while not stop_event.is_set():
-      #waiting for q + enter
-
-      global dataFlag
-
-      if dataFlag :
-         #oh yea, we have new messages waiting
-         dataFlag = False
-
-	       #collect valueable data
-         data = await client.read_gatt_char(write_char_uuid)
-
-      else:
-        #give some time to do other tasks
-        await asyncio.sleep(1)
-      
 if __name__ == "__main__":
    #Device MC-b560-DK5EN-99, Address: D4:D4:DA:9E:B5:62
    #Device MC-83ac-DK5EN-99, Address: 48:CA:43:3A:83:AD
    
-   address = ( "48:CA:43:3A:83:AD" )
+   #mehrere Nodes gleichzeitig: addresses = ["D4:D4:DA:9E:B5:62", "48:CA:43:3A:83:AD"]
+   #oder per Rufzeichen aus der Registry: addresses = ["DK5EN-99"]
+   addresses = ["48:CA:43:3A:83:AD"]
+
+   #capture_file = "mc.cap"
+   capture_file = None
+
+   #db_file = "mc.db"
+   db_file = None
+
+   #heard_file = "mheard.json"
+   heard_file = None
 
-   loop = asyncio.new_event_loop()
-   asyncio.set_event_loop(loop)
+   #jsonl_file = "mc.jsonl"
+   jsonl_file = None
 
-   loop.run_until_complete(run(address, loop))
+   asyncio.run(run(addresses, capture_file, db_file, heard_file, jsonl_file))
@@ -23,6 +23,9 @@ MeshCom node tested against a RaspberryPi 5, with 8GB RAM and Debian Bookwork
 
 If you CRTL + c the script, be sure to reset the bluetooth stack with:
 sudo systemctl restart bluetooth
+
+If meshcom_daemon.py is running, the message is handed over to it and goes out over
+the already open connection. Otherwise the script connects on its own as before.
 """
 """
 Disclaimer: a word of Caution: as the MeshCom firmware is under heavy development, expect to see changes on the BLE interface
@@ -54,6 +57,8 @@ This script is provided "as is", without warranty of any kind, express or implie
 """
 import asyncio
 from bleak import BleakClient
+from meshcom_daemon import send_via_daemon
+from meshcom_discovery import resolve_node
 
 write_char_uuid = "6e400002-b5a3-f393-e0a9-e50e24dcca9e" # UUID_Char_WRITE
 read_char_uuid =  "6e400003-b5a3-f393-e0a9-e50e24dcca9e" # UUID_Char_NOTIFY
@@ -72,11 +77,11 @@ async def write_characteristic(client, char_uuid, data):
   except Exception as e:
     print(f"Error writing characteristic: {e}")
 
-async def run(message):
+async def run(message, address):
   print("Searching for BLE device ...")
-  async with BleakClient (MAC_ADDRESS) as client:
+  async with BleakClient (address) as client:
     if client.is_connected:
-      print(f"Connected: {MAC_ADDRESS}")
+      print(f"Connected: {address}")
 
     byte_array = bytearray( message.encode('utf-8'))
 
@@ -92,14 +97,28 @@ async def run(message):
     await write_characteristic(client, write_char_uuid, byte_array)
 
 
+async def send(grp, msg):
+  #MAC direkt, Name oder Rufzeichen aus der Registry von BLE-Scan.py, gescannt wird nur wenn unbekannt
+  address = await resolve_node(MAC_ADDRESS)
+
+  #laufender Dienst hat die Verbindung schon offen, das geht in Millisekunden
+  try:
+    await send_via_daemon(grp, msg, node=address)
+    print(f"Queued via meshcom_daemon: {{{grp}}}{msg}")
+    return
+  except OSError:
+    pass
+
+  await run("{" + grp + "}" + msg, address)
+
+
 #MAC_ADDRESS = "D4:D4:DA:9E:B5:62" #T-LoRa
 MAC_ADDRESS = "48:CA:43:3A:83:AD" #Heltec v3
+#MAC_ADDRESS = "DK5EN-99" #geht auch, wenn BLE-Scan.py den Node schon gefunden hat
 
-#grp = "DK5EN-99"
-grp = "TEST"
-msg = "Test 57 mit Python über bluetooth"
-
-message = "{" + grp + "}" + msg
+if __name__ == "__main__":
+  #grp = "DK5EN-99"
+  grp = "TEST"
+  msg = "Test 57 mit Python über bluetooth"
 
-loop = asyncio.get_event_loop()
-loop.run_until_complete(run(message))
+  asyncio.run(send(grp, msg))
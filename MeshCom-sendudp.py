@@ -43,23 +43,8 @@ Under the following terms:
 Disclaimer:
 This script is provided "as is", without warranty of any kind, express or implied.
 """
-import socket
-
-def send_udp_message (message, ip_address, port):
-  try:
-    # Create an UDP socket
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-    # Send a Message
-    sock.sendto(message.encode(), (ip_address,port))
-
-    # Close the socket
-    sock.close()
-
-    return True
-  except Exception as e:
-    print(f"Error: {e}")
-    return False
+import asyncio
+from meshcom_udp import UdpClient, udp_message, MC_PORT
 
 #grp="999"
 #grp="DK5EN-99"
@@ -73,15 +58,20 @@ grp="TEST"
 #Standard Text an MeshCom
 msg="Test auf die " + grp + " via UDP + DNS Auflösung zusammengesetzt"
 
-message = "{\"type\":\"msg\",\"dst\":\"" + grp + "\",\"msg\":\"" + msg + "\"}"
-
-print(f"Message : {message}")
-port = 1799 #	 stadard Port für MC
-
 hostname = "dk5en-99.local"
-ip_address = socket.gethostbyname(hostname)
 
-if send_udp_message(message,ip_address,port):
-    print("Message sent sccessful!")
-else:
-    print("Failed to send message.")
+async def main():
+  message = udp_message(grp, msg)
+  print(f"Message : {message.decode()}")
+
+  #Socket und DNS Aufloesung werden fuer alle weiteren Nachrichten wiederverwendet
+  #mehrere auf einmal: await client.send_batch(hostname, [udp_message(grp, m) for m in msgs])
+  async with UdpClient(MC_PORT) as client:
+    try:
+      await client.send(hostname, message)
+      print("Message sent sccessful!")
+    except OSError as e:
+      print(f"Error: {e}")
+      print("Failed to send message.")
+
+asyncio.run(main())
@@ -25,6 +25,9 @@ There are reprequistes to be met, otherwise the script will fail:
     You need a NetAtmo weather station with outdoor module, rain and wind 
     --extudp must be on you MeshCom node and it must be reachable within the network
     You need a RaspberryPi 5, with 8GB RAM and Debian Bookwork
+
+Laeuft meshcom_daemon.py, geht der Bericht mit niedriger Prioritaet und coalesce-Schluessel "wx-<Gruppe>" an den Dienst,
+ein noch nicht gesendeter aelterer Bericht an dieselbe Gruppe wird dann durch den neuen ersetzt. Sonst direkt per UDP.
 """
 """
 License:
@@ -51,7 +54,9 @@ import json
 import re
 import os
 from datetime import datetime, timedelta
-import socket
+import asyncio
+from meshcom_daemon import send_via_daemon
+from meshcom_udp import UdpClient
 
 CONFIG_FILE = "/etc/NetAtmo-wx/config.jsonc"
 TOKENS_FILE = "tokens.json"
@@ -337,26 +342,12 @@ def format_weather_report():
 
     return f"{get_greeting()}, WX {home}/{locator}: {temp}°C, {humidity}% relH, QNH:{pressure}hPa/{abs_pressure}hPa, rain {rain}mm/24h, wind {wind:.1f}km/h"
 
-def send_udp_message (message, ip_address, port):
-  try:
-    # Create an UDP socket
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-    # Send a Message
-    sock.sendto(message.encode(), (ip_address,port))
-
-    # Close the socket
-    sock.close()
+#ein Client fuer alle Sendungen, Socket und DNS Aufloesung werden wiederverwendet
+udp_client = UdpClient()
 
-    return True
-  except Exception as e:
-    print(f"Error: {e}")
-    return False
-
-def send_mc_msg(grp, text):
-   port = 1799 #    stadard Port für MC
+async def send_mc_msg(grp, text, client=None):
    hostname = "dk5en-99.local"
-
+   client = client or udp_client
 
    msg= text
 
@@ -364,15 +355,30 @@ def send_mc_msg(grp, text):
    #msg="APRS:Test auf die " + grp + " via UDP + DNS Auflösung zusammengesetzt"
    #msg="APRS: mal alles raus an aprsi.fi "
 
-   message = "{\"type\":\"msg\",\"dst\":\"" + grp + "\",\"msg\":\"" + msg + "\"}"
-   #print(f"Message : {message}")
-
-   ip_address = socket.gethostbyname(hostname)
-   if send_udp_message(message,ip_address,port):
-       #print(f"Message sent sccessful!")
-       print(f"")
-   else:
-       print("Failed to send message.")
+   #laufender Dienst: einreihen, aeltere Wetterberichte an dieselbe Gruppe fasst der Scheduler zusammen
+   try:
+     await send_via_daemon(grp, msg, prio="low", coalesce=f"wx-{grp}")
+     print(f"Queued via meshcom_daemon: {{{grp}}}{msg}")
+     return
+   except OSError:
+     pass
+
+   #kein eigener Socket pro Aufruf, geschlossen wird der Client vom Aufrufer am Ende
+   try:
+     await client.send_message(hostname, grp, msg)
+     #print(f"Message sent sccessful!")
+     print(f"")
+   except OSError as e:
+     print(f"Error: {e}")
+     print("Failed to send message.")
+
+async def send_reports(groups, text):
+   """Dieselbe Meldung an mehrere Gruppen, alle ueber udp_client, danach wird er geschlossen."""
+   try:
+     for grp in groups:
+       await send_mc_msg(grp, text)
+   finally:
+     await udp_client.close()
 
 if __name__ == "__main__":
     #print(format_weather_report())
@@ -383,5 +389,5 @@ if __name__ == "__main__":
     #grp="*"
 
     #Wettermeldungen in nach TEST / sonst Gruppe 20
-    send_mc_msg("TEST", wx_report)
+    asyncio.run(send_reports(["TEST"], wx_report))
     print(f"{wx_report}")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Ein Einstieg fuer alle Tools, jedes Unterkommando importiert erst, was es wirklich braucht.
+    Fuer systemd Timer und cron zaehlt bei einem einzelnen Send der Python Start mehr als das Senden,
+    "send" ueber den laufenden meshcom_daemon laedt z.B. weder bleak noch sqlite3.
+
+    $ python3 meshcom.py scan [DK5EN-99]
+    $ python3 meshcom.py read 48:CA:43:3A:83:AD [--db mc.db]
+    $ python3 meshcom.py send TEST "Hallo" [--node DK5EN-99]
+    $ python3 meshcom.py listen-udp [--ingest]
+    $ python3 meshcom.py serial [--port /dev/ttyACM0]
+    $ python3 meshcom.py wx [--group 20]
+    $ python3 meshcom.py startup       Kaltstart pro Unterkommando messen, Verlauf in meshcom_startup.jsonl
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STARTUP_HISTORY = os.path.join(HERE, "meshcom_startup.jsonl")
+
+def load_script(filename):
+    """Skripte mit '-' im Namen lassen sich nicht importieren, also ueber den Dateipfad laden (ohne __main__)."""
+    import importlib.util
+
+    name = os.path.splitext(filename)[0].replace("-", "_").lower()
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+#Jedes Unterkommando: load(args) importiert und liefert eine Funktion, die die eigentliche Arbeit macht.
+#So kann "startup" die Importe alleine messen.
+
+def load_scan(args):
+    import asyncio
+    from meshcom_discovery import main
+
+    return lambda: asyncio.run(main(args.match, args.timeout))
+
+def load_read(args):
+    import asyncio
+
+    read = load_script("MeshCom-Read.py")
+
+    return lambda: asyncio.run(read.run(args.nodes, args.capture, args.db, args.heard, args.jsonl))
+
+def load_send(args):
+    import asyncio
+    from meshcom_daemon import send_via_daemon
+    from meshcom_discovery import resolve_node
+
+    async def send():
+        node = args.node or os.environ.get("MESHCOM_NODE")
+        if not node:
+            raise SystemExit("kein Node: --node oder MESHCOM_NODE setzen")
+        address = await resolve_node(node)
+        try:
+            await send_via_daemon(args.dst, args.msg, node=address, prio=args.prio)
+            print(f"Queued via meshcom_daemon: {{{args.dst}}}{args.msg}")
+            return
+        except OSError:
+            pass
+        #kein Dienst, dann direkt per BLE, erst jetzt wird bleak geladen
+        write = load_script("MeshCom-Write.py")
+        await write.run("{" + args.dst + "}" + args.msg, address)
+
+    return lambda: asyncio.run(send())
+
+def load_listen_udp(args):
+    import asyncio
+
+    readudp = load_script("readudp.py")
+    if args.ingest:
+        from meshcom_ingest import install_uvloop
+        install_uvloop()
+    return lambda: asyncio.run(readudp.read_udp_message(args.host, args.port, args.ingest))
+
+def load_serial(args):
+    import asyncio
+
+    serial_reader = load_script("serial_reader.py")
+    return lambda: asyncio.run(serial_reader.main(args.port, args.baudrate))
+
+def load_wx(args):
+    import asyncio
+
+    wx = load_script("NetAtmo-wx.py")
+
+    def run():
+        report = wx.format_weather_report()
+        asyncio.run(wx.send_reports([args.group], report))
+        print(report)
+    return run
+
+def measure_startup(commands, repeat=5):
+    """Jedes Unterkommando in einem frischen Prozess nur laden, beste Zeit von repeat Laeufen."""
+    import json
+    import subprocess
+    import time
+
+    def best(argv):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            done = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if done.returncode:
+                #z.B. wx ohne requests, die anderen trotzdem messen, stderr kann auch leer sein
+                lines = done.stderr.decode(errors="replace").strip().splitlines()
+                print(f"Rueckgabewert {done.returncode}" + (f": {lines[-1]}" if lines else ""))
+                return None
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    baseline = best([sys.executable, "-c", "pass"])
+    result = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+              "baseline_ms": round(baseline * 1000, 1), "commands": {}}
+    print(f"{'python -c pass':14} {baseline * 1000:7.1f} ms")
+    for name, argv in commands.items():
+        elapsed = best([sys.executable, os.path.abspath(__file__), "--load-only"] + argv)
+        if elapsed is None:
+            result["commands"][name] = None
+            print(f"{name:14}  nicht ladbar")
+            continue
+        result["commands"][name] = round(elapsed * 1000, 1)
+        print(f"{name:14} {elapsed * 1000:7.1f} ms  (+{(elapsed - baseline) * 1000:.1f} ms)")
+
+    with open(STARTUP_HISTORY, "a", encoding="utf-8") as file:
+        file.write(json.dumps(result) + "\n")
+    print(f"Verlauf: {STARTUP_HISTORY}")
+
+#Beispielaufrufe fuer "startup", geladen wird nur, nichts wird gesendet
+STARTUP_COMMANDS = {
+    "scan": ["scan"],
+    "read": ["read", "00:00:00:00:00:00"],
+    "send": ["send", "TEST", "x", "--node", "00:00:00:00:00:00"],
+    "listen-udp": ["listen-udp"],
+    "serial": ["serial"],
+    "wx": ["wx"],
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="meshcom", description="MeshCom Tools")
+    parser.add_argument("--load-only", action="store_true", help=argparse.SUPPRESS)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scan", help="MeshCom Nodes per BLE finden")
+    p.add_argument("match", nargs="?", help="Adresse, Name oder Rufzeichen")
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.set_defaults(load=load_scan)
+
+    p = sub.add_parser("read", help="von einem oder mehreren Nodes per BLE lesen")
+    p.add_argument("nodes", nargs="+", help="MAC, Name oder Rufzeichen")
+    p.add_argument("--capture", help="rohe Frames mitschreiben")
+    p.add_argument("--db", help="SQLite Datei")
+    p.add_argument("--heard", help="MHeard Snapshot Datei")
+    p.add_argument("--jsonl", help="jeden Frame zusaetzlich als JSON Zeile schreiben")
+    p.set_defaults(load=load_read)
+
+    p = sub.add_parser("send", help="Nachricht senden, ueber meshcom_daemon falls er laeuft")
+    p.add_argument("dst", help="Gruppe oder Rufzeichen")
+    p.add_argument("msg")
+    p.add_argument("--node", help="MAC, Name oder Rufzeichen, sonst MESHCOM_NODE")
+    p.add_argument("--prio", choices=["high", "normal", "low"])
+    p.set_defaults(load=load_send)
+
+    p = sub.add_parser("listen-udp", help="UDP vom Node (--extudp) empfangen")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=1799)
+    p.add_argument("--ingest", action="store_true", help="Batch-Empfang fuer viele Nodes")
+    p.set_defaults(load=load_listen_udp)
+
+    p = sub.add_parser("serial", help="USB-Seriell Konsole des Nodes lesen")
+    p.add_argument("--port", default="/dev/ttyACM0")
+    p.add_argument("--baudrate", type=int, default=115200)
+    p.set_defaults(load=load_serial)
+
+    p = sub.add_parser("wx", help="Wetterbericht von NetAtmo an eine Gruppe senden")
+    p.add_argument("--group", default="TEST")
+    p.set_defaults(load=load_wx)
+
+    p = sub.add_parser("startup", help="Kaltstart der Unterkommandos messen")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(load=None)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "startup":
+        measure_startup(STARTUP_COMMANDS, args.repeat)
+        return
+    run = args.load(args)
+    if not args.load_only:
+        run()
+
+if __name__ == "__main__":
+    main()
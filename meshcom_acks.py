@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_acks.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Ordnet empfangene @A ACK Frames den selbst gesendeten Nachrichten zu und misst die Zustellung.
+    Ablauf:
+      1. register(dst, text) beim Senden, die msg_id vergibt erst der Node
+      2. der Node schickt die eigene Nachricht als @: Frame zurueck, daraus kommt die msg_id
+      3. ein @A Frame mit ack_id == msg_id bestaetigt die Zustellung, Nachschlagen per dict in O(1)
+    Nicht bestaetigte Nachrichten verfallen nach timeout Sekunden und zaehlen als verloren.
+    Pro Ziel gibt es gesendet/bestaetigt/verloren und ein Histogramm der ACK Laufzeit.
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from time import monotonic
+from meshcom_records import TextFrame, AckFrame
+
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300)  # Sekunden, obere Grenzen
+
+class DestStats:
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.lost = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # letzter Eintrag: darueber
+
+    def as_dict(self):
+        done = self.acked + self.lost
+        return {
+            "sent": self.sent,
+            "acked": self.acked,
+            "lost": self.lost,
+            "delivery_ratio": self.acked / done if done else None,
+            "latency_avg": self.latency_sum / self.acked if self.acked else None,
+            "latency_hist": dict(zip([f"le_{b}" for b in LATENCY_BUCKETS] + ["inf"], self.buckets)),
+        }
+
+class Outbound:
+    __slots__ = ("dst", "text", "t_sent", "msg_id")
+
+    def __init__(self, dst, text, t_sent):
+        self.dst = dst
+        self.text = text
+        self.t_sent = t_sent
+        self.msg_id = None
+
+class AckTracker:
+    def __init__(self, timeout=300.0, own_call=None):
+        self.timeout = timeout
+        self.own_call = own_call
+        self.per_dest = {}
+        self.unmatched_acks = 0
+        self._pending = {}               # dst -> deque, warten auf das Echo mit msg_id
+        self._by_msg_id = OrderedDict()  # msg_id -> Outbound, aelteste vorne
+
+    def _dest(self, dst):
+        stats = self.per_dest.get(dst)
+        if stats is None:
+            stats = self.per_dest[dst] = DestStats()
+        return stats
+
+    def register(self, dst, text, now=None):
+        """Beim Senden aufrufen, dst ist Gruppe oder Rufzeichen wie im '{dst}text' Format."""
+        entry = Outbound(dst, text, monotonic() if now is None else now)
+        self._pending.setdefault(dst, deque()).append(entry)
+        self._dest(dst).sent += 1
+        return entry
+
+    def on_frame(self, frame, now=None):
+        """Mit jedem dekodierten Frame aufrufen, alles ausser @: und @A wird ignoriert."""
+        if now is None:
+            now = monotonic()
+
+        if isinstance(frame, AckFrame):
+            entry = self._by_msg_id.pop(frame.ack_id, None)
+            if entry is None:
+                self.unmatched_acks += 1
+                return
+            latency = now - entry.t_sent
+            stats = self._dest(entry.dst)
+            stats.acked += 1
+            stats.latency_sum += latency
+            stats.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+        elif isinstance(frame, TextFrame) and frame.payload_type == 0x3A:
+            pending = self._pending.get(frame.dest)
+            if not pending:
+                return
+            if self.own_call and not frame.path.startswith(self.own_call):
+                return
+            #Echo der eigenen Nachricht, Text steht nach dem ':'
+            message = frame.message
+            if message.startswith(":"):
+                message = message[1:]
+            for entry in pending:
+                if message.startswith(entry.text):
+                    pending.remove(entry)
+                    entry.msg_id = frame.msg_id
+                    self._by_msg_id[entry.msg_id] = entry
+                    break
+
+        self.expire(now)
+
+    def expire(self, now=None):
+        if now is None:
+            now = monotonic()
+        limit = now - self.timeout
+        while self._by_msg_id:
+            msg_id, entry = next(iter(self._by_msg_id.items()))
+            if entry.t_sent >= limit:
+                break
+            del self._by_msg_id[msg_id]
+            self._dest(entry.dst).lost += 1
+        for pending in self._pending.values():
+            while pending and pending[0].t_sent < limit:
+                self._dest(pending.popleft().dst).lost += 1
+
+    def snapshot(self):
+        self.expire()
+        return {
+            "waiting": len(self._by_msg_id) + sum(len(p) for p in self._pending.values()),
+            "unmatched_acks": self.unmatched_acks,
+            "per_dest": {dst: s.as_dict() for dst, s in self.per_dest.items()},
+        }
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_archive.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Archivformat fuer dekodierte MeshCom Nachrichten, JSONL in einzeln entpackbaren zstd Frames.
+    Die Frames werden mit einem auf MeshCom Verkehr trainierten Woerterbuch komprimiert, dadurch
+    packen auch kleine Bloecke gut (siehe Vergleich der Packer im README, mcdump.json).
+    Jeder Block hat einen kleinen Kopf mit Zeitraum und Laenge, fuer eine Zeitspanne werden nur
+    die passenden Bloecke entpackt, der Rest wird uebersprungen.
+
+    Datei:  MAGIC, <I Laenge Woerterbuch, Woerterbuch
+    Block:  <qqII erste/letzte rx_time in ms, Anzahl Zeilen, Laenge, zstd Frame
+    Beim Import zaehlt die Zeit aus dem Record (rx_time, timestamp oder DATE), Nachrichten ohne Zeit werden abgelehnt.
+
+    $ python3 meshcom_archive.py train mcdump.json meshcom.zdict
+    $ python3 meshcom_archive.py pack mcdump.json mcdump.mca --dict meshcom.zdict
+    $ python3 meshcom_archive.py cat mcdump.mca --from 2025-03-24T18:00 --to 2025-03-24T20:00
+    $ python3 meshcom_archive.py stats mcdump.mca
+
+Requires: pip install zstandard
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import json
+import os
+from datetime import datetime
+from struct import Struct
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"MCARC1\n\x00"
+DICT_LEN = Struct('<I')
+BLOCK = Struct('<qqII')   # t_first_ms, t_last_ms, Zeilen, Laenge zstd Frame
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("Das Archiv braucht das Paket zstandard: pip install zstandard")
+
+def record_time(record):
+    """Zeitpunkt eines Records in Sekunden seit Epoch: rx_time, sonst timestamp (s oder ms) oder DATE
+    ("2025-03-24 21:26:00", Ortszeit wie vom Node). Ohne Zeit gibt es ValueError, denn mit der Zeit beim Packen
+    stuenden alle Nachrichten eines Imports im selben Zeitraum und --from/--to fanden nichts mehr."""
+    if not isinstance(record, dict):
+        raise ValueError(f"Nachricht ist kein JSON Objekt: {_dumps(record)[:120].decode()}")
+    if record.get("rx_time") is not None:
+        return float(record["rx_time"])
+    timestamp = record.get("timestamp")
+    if isinstance(timestamp, (int, float)):
+        return timestamp / 1000 if timestamp > 1e11 else float(timestamp)
+    if isinstance(record.get("DATE"), str):
+        return datetime.fromisoformat(record["DATE"]).timestamp()
+    raise ValueError(f"Nachricht ohne Zeit (rx_time, timestamp oder DATE): {_dumps(record)[:120].decode()}")
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def load_records(path):
+    """Liest JSONL oder ein JSON Array, z.B. den mcdump.json Export."""
+    with open(path, "r", encoding="utf-8") as file:
+        head = file.read(1)
+        file.seek(0)
+        if head == "[":
+            return json.load(file)
+        return [json.loads(line) for line in file if line.strip()]
+
+def train_dictionary(records, size=16 * 1024):
+    """Trainiert ein zstd Woerterbuch auf Beispielnachrichten, liefert die Bytes zum Speichern."""
+    _require_zstd()
+    samples = [_dumps(r) + b"\n" for r in records]
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+class ArchiveWriter:
+    """Schreibt Nachrichten blockweise, ein Block ist voll nach block_records Zeilen oder block_seconds."""
+
+    def __init__(self, path, dictionary=None, level=19, block_records=256, block_seconds=600):
+        _require_zstd()
+        self.block_records = block_records
+        self.block_ms = int(block_seconds * 1000)
+        self._lines = []
+        self._t_first = None
+        self._t_last = None
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            #an ein bestehendes Archiv anhaengen, dann gilt dessen Woerterbuch
+            with open(path, "rb") as file:
+                dictionary = _read_header(file)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            dictionary = dictionary or b""
+            self._file.write(MAGIC + DICT_LEN.pack(len(dictionary)) + dictionary)
+
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data, write_checksum=True)
+
+    def add(self, record, rx_time=None):
+        """rx_time in Sekunden seit Epoch, sonst aus dem Record (record_time), record muss ein JSON Objekt sein."""
+        if hasattr(record, "as_dict"):
+            record = record.as_dict()
+        if rx_time is None:
+            rx_time = record_time(record)
+        elif not isinstance(record, dict):
+            raise ValueError(f"Nachricht ist kein JSON Objekt: {_dumps(record)[:120].decode()}")
+        if "rx_time" not in record:
+            record = {"rx_time": rx_time, **record}
+        t_ms = int(rx_time * 1000)
+
+        if self._lines and (len(self._lines) >= self.block_records or t_ms - self._t_first >= self.block_ms):
+            self.flush()
+        if self._t_first is None:
+            self._t_first = self._t_last = t_ms
+        self._t_first = min(self._t_first, t_ms)
+        self._t_last = max(self._t_last, t_ms)
+        self._lines.append(_dumps(record))
+
+    def flush(self):
+        if not self._lines:
+            return
+        frame = self._compressor.compress(b"\n".join(self._lines) + b"\n")
+        self._file.write(BLOCK.pack(self._t_first, self._t_last, len(self._lines), len(frame)))
+        self._file.write(frame)
+        self._file.flush()
+        self._lines = []
+        self._t_first = None
+        self._t_last = None
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _read_header(file):
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("kein MeshCom Archiv")
+    (length,) = DICT_LEN.unpack(file.read(DICT_LEN.size))
+    return file.read(length)
+
+class ArchiveReader:
+    """Liest Blockkoepfe ohne zu entpacken, entpackt nur Bloecke im gesuchten Zeitraum."""
+
+    def __init__(self, path):
+        _require_zstd()
+        self._file = open(path, "rb")
+        dictionary = _read_header(self._file)
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+        self.dictionary_size = len(dictionary)
+        self.index = self._scan()
+
+    def _scan(self):
+        index = []
+        while True:
+            head = self._file.read(BLOCK.size)
+            if len(head) < BLOCK.size:
+                break
+            t_first, t_last, count, length = BLOCK.unpack(head)
+            offset = self._file.tell()
+            self._file.seek(length, os.SEEK_CUR)
+            if self._file.tell() > os.fstat(self._file.fileno()).st_size:
+                break  # abgeschnittener Block am Ende
+            index.append((t_first, t_last, count, offset, length))
+        return index
+
+    def records(self, t_from=None, t_to=None):
+        """Nachrichten mit t_from <= rx_time < t_to (Sekunden), None heisst offen."""
+        ms_from = None if t_from is None else int(t_from * 1000)
+        ms_to = None if t_to is None else int(t_to * 1000)
+        for t_first, t_last, count, offset, length in self.index:
+            if (ms_from is not None and t_last < ms_from) or (ms_to is not None and t_first >= ms_to):
+                continue
+            self._file.seek(offset)
+            data = self._decompressor.decompress(self._file.read(length))
+            for line in data.splitlines():
+                record = json.loads(line)
+                t_ms = int(record["rx_time"] * 1000)
+                if (ms_from is None or t_ms >= ms_from) and (ms_to is None or t_ms < ms_to):
+                    yield record
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    def timestamp(value):
+        return datetime.fromisoformat(value).timestamp()
+
+    parser = argparse.ArgumentParser(description="MeshCom Nachrichtenarchiv (zstd + Woerterbuch)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("train", help="Woerterbuch aus JSON/JSONL trainieren")
+    p.add_argument("source")
+    p.add_argument("dictionary")
+    p.add_argument("--size", type=int, default=16 * 1024)
+    p = sub.add_parser("pack", help="JSON/JSONL ins Archiv schreiben")
+    p.add_argument("source")
+    p.add_argument("archive")
+    p.add_argument("--dict", dest="dictionary")
+    p.add_argument("--level", type=int, default=19)
+    p = sub.add_parser("cat", help="Nachrichten als JSONL ausgeben")
+    p.add_argument("archive")
+    p.add_argument("--from", dest="t_from", type=timestamp)
+    p.add_argument("--to", dest="t_to", type=timestamp)
+    p = sub.add_parser("stats", help="Bloecke und Groessen anzeigen")
+    p.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        dictionary = train_dictionary(load_records(args.source), args.size)
+        with open(args.dictionary, "wb") as file:
+            file.write(dictionary)
+        print(f"Woerterbuch mit {len(dictionary)} Bytes geschrieben")
+
+    elif args.command == "pack":
+        dictionary = None
+        if args.dictionary:
+            with open(args.dictionary, "rb") as file:
+                dictionary = file.read()
+        #erst alle Zeiten pruefen, damit ein Fehler kein halbes Archiv hinterlaesst
+        records = load_records(args.source)
+        times = []
+        for n, record in enumerate(records, 1):
+            try:
+                times.append(record_time(record))
+            except ValueError as e:
+                sys.exit(f"{args.source}, Nachricht {n}: {e}")
+        with ArchiveWriter(args.archive, dictionary, args.level) as writer:
+            for record, rx_time in zip(records, times):
+                writer.add(record, rx_time)
+        print(f"{os.path.getsize(args.source)} -> {os.path.getsize(args.archive)} Bytes")
+
+    elif args.command == "cat":
+        with ArchiveReader(args.archive) as reader:
+            for record in reader.records(args.t_from, args.t_to):
+                print(json.dumps(record, ensure_ascii=False))
+
+    else:
+        with ArchiveReader(args.archive) as reader:
+            lines = sum(entry[2] for entry in reader.index)
+            packed = sum(entry[4] for entry in reader.index)
+            print(f"{len(reader.index)} Bloecke, {lines} Nachrichten, {packed} Bytes komprimiert, "
+                  f"Woerterbuch {reader.dictionary_size} Bytes")
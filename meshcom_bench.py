@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_bench.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Micro-Benchmark fuer die Frame-Decoder aus meshcom_frames.py
+    Vergleicht decode_binary_message (Referenz) mit decode_binary_frame und gibt Frames/s aus.
+    Vorher wird geprueft, ob beide Decoder dieselben Felder liefern und ob FramePipeline mit Metriken und Profiler
+    jeden bytearray Frame (so liefert ihn BLE) bis zur Ausgabe bringt.
+    Dazu die FCS Pruefung Frame fuer Frame gegen check_fcs_batch (NumPy und Fallback)
+    und die JSON Frames pro TYP, decode_json_message gegen decode_json_frame, mit Speicher fuer den Konfig-Burst.
+
+    Mit "suite" laufen Dekodieren (gemischt und pro Typ), Duplikatfilter, MHeard und Speichern (SQLite,
+    Mitschnitt, Archiv) ueber synthetische Frames aus meshcom_synth.py. Pro Stufe gibt es Frames/s und Speicher
+    pro Frame, jeder Lauf wird an meshcom_bench.jsonl angehaengt und mit dem letzten verglichen.
+
+    $ python3 meshcom_bench.py
+    $ python3 meshcom_bench.py suite --count 20000
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from meshcom_frames import TRAILER, calc_fcs, decode_binary_message, decode_binary_frame
+from meshcom_frames import decode_json_message, decode_json_frame, orjson
+from meshcom_frames import pack_frames, check_fcs_batch, load_numpy
+from meshcom_records import DecodeError
+from meshcom_synth import build_frame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_HISTORY = os.path.join(HERE, "meshcom_bench.jsonl")
+REGRESSION = 0.10  # so viel langsamer als der letzte Lauf wird markiert
+
+SAMPLE_FRAMES = [
+    build_frame(ord(':'), 0x1A2B3C4D, "DK5EN-99,OE1XAR-12>20:Hallo Gruppe 20, Test über BLE"),
+    build_frame(ord(':'), 0x1A2B3C4E, "DK5EN-99>*:{CET}2025-03-24 21:26:00"),
+    build_frame(ord(':'), 0x1A2B3C4F, "OE3WAS-1,DK5EN-99>DK5EN-99:Direktnachricht"),
+    build_frame(ord('!'), 0x0BADCAFE, "DK5EN-99>*!4812.34N/01123.45E#/B=087/A=001700"),
+    build_frame(ord('A'), 0x00C0FFEE, "", ack_id=0x1A2B3C4D),
+]
+
+#So kommt der Konfig-Burst nach dem HELLO, ein Frame pro TYP, D vorne und 0x00 hinten
+SAMPLE_JSON = {
+    "MH": b'D{"TYP":"MH","CALL":"OE1KBC-12","HW":43,"MOD":3,"RT":1,"RC":0,"DI":-1,"PL":0,"RSSI":-112,"SNR":7,"DATE":"2025-03-24 21:26:00"}\x00',
+    "SA": b'D{"TYP":"SA","ATXT":"","SYMID":"/","SYMCD":"#","NAME":"DK5EN-99","OWNCALL":"DK5EN-99","GW":0}\x00',
+    "G": b'D{"TYP":"G","LAT":48.2057,"LON":11.3908,"ALT":520,"SAT":0,"SFIX":false,"HDOP":0,"RATE":1200,"NEXT":1166,"DIST":0,"DIRn":0,"DIRo":0,"DATE":"2025-03-24 21:26:00"}\x00',
+    "W": b'D{"TYP":"W","TEMP":12.3,"TOUT":0,"HUM":55,"PRES":1013.2,"QNH":1016.4,"ALT":520,"GAS":0,"CO2":0}\x00',
+    "SN": b'D{"TYP":"SN","GW":false,"WS":false,"WSPWD":"","DISP":true,"BTN":false,"MSH":true,"GPS":false,"TRACK":false,"UTCOF":1,"TXP":22,"MQRG":433.175,"MSF":11,"MCR":6,"MBW":250,"GWNPOS":false,"MHONLY":false,"NOALL":false,"BEEP":false,"CTRY":"EU","BOOST":false}\x00',
+    "SE": b'D{"TYP":"SE","BME":false,"BMP":false,"680":false,"811":false,"SMALL":false,"SS":false,"LPS33":false,"OW":false,"OWPIN":-1}\x00',
+    "SW": b'D{"TYP":"SW","SSID":"meshcom","PW":"","IP":"192.168.1.42","GW":"192.168.1.1","AP":false,"DNS":"192.168.1.1","SUB":"255.255.255.0","OWNIP":"0.0.0.0","OWNGW":"0.0.0.0","OWNMS":"0.0.0.0","OWNDNS":"0.0.0.0","EUDP":true,"EUDPIP":"192.168.1.10"}\x00',
+    "I": b'D{"TYP":"I","FWVER":"4.34","FWSUB":"v","CALL":"DK5EN-99","ID":1234567890,"HWID":43,"MAXV":4.24,"ATXT":"","BLE":"short","BATP":100,"BATV":4.12,"GCB":[0,0,0,0,0,0],"CTRY":"EU","BOOST":false}\x00',
+    "CONFFIN": b'D{"TYP":"CONFFIN"}\x00',
+}
+
+def check_equal(frames):
+    for frame in frames:
+        expected = decode_binary_message(frame)
+        got = decode_binary_frame(bytearray(frame))
+        got = str(got) if isinstance(got, DecodeError) else got.as_dict()
+        if expected != got or (isinstance(got, dict) and list(expected) != list(got)):
+            raise SystemExit(f"Decoder weichen ab:\n{expected}\n{got}")
+
+def check_equal_json():
+    for typ, frame in SAMPLE_JSON.items():
+        expected = decode_json_message(frame)
+        got = decode_json_frame(bytearray(frame)).as_dict()
+        if expected != got:
+            raise SystemExit(f"JSON Decoder weichen ab fuer {typ}:\n{expected}\n{got}")
+
+def check_pipeline(frames):
+    """Frames als bytearray (wie von BLE) durch FramePipeline mit Metriken und Profiler,
+    jeder muss bei dispatch ankommen."""
+    import asyncio
+    from meshcom_metrics import MetricsRegistry, register_pipeline
+    from meshcom_pipeline import FramePipeline
+    from meshcom_profiler import StageProfiler
+
+    async def run():
+        seen = []
+        pipeline = FramePipeline(lambda sender, raw, decoded: seen.append(decoded), profiler=StageProfiler())
+        register_pipeline(MetricsRegistry(), pipeline)
+        pipeline.start()
+        for frame in frames:
+            pipeline.feed("test", bytearray(frame))
+        await pipeline.stop()
+        return seen
+
+    seen = asyncio.run(run())
+    if len(seen) != len(frames):
+        raise SystemExit(f"FramePipeline: {len(seen)} von {len(frames)} Frames ausgegeben")
+
+def burst_memory(decoder, frames, rounds=100):
+    """Spitze des Speichers und Anzahl belegter Bloecke fuer rounds Konfig-Bursts, gemessen mit tracemalloc."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = [decoder(frame) for _ in range(rounds) for frame in frames]
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return peak, blocks
+
+def fcs_single(frames):
+    """So wie bisher: calc_fcs pro Frame und Vergleich mit dem FCS aus dem Trailer."""
+    return [calc_fcs(f[1:-11]) == TRAILER.unpack_from(f, len(f) - 14)[3] for f in frames]
+
+def bench(decoder, frames, number):
+    """Frames pro Sekunde, bester von drei Laeufen."""
+    def loop():
+        for frame in frames:
+            decoder(frame)
+    best = min(timeit.repeat(loop, number=number, repeat=3))
+    return len(frames) * number / best
+
+def micro():
+    #BLE liefert bytearray, also auch so messen
+    frames = [bytearray(f) for f in SAMPLE_FRAMES]
+    check_equal(frames)
+    check_pipeline(SAMPLE_FRAMES + list(SAMPLE_JSON.values()))
+
+    number = 20000
+    old = bench(decode_binary_message, frames, number)
+    new = bench(decode_binary_frame, frames, number)
+
+    print(f"decode_binary_message: {old:12,.0f} frames/s")
+    print(f"decode_binary_frame:   {new:12,.0f} frames/s  ({new / old:.2f}x)")
+
+    #JSON Frames pro TYP
+    check_equal_json()
+    print(f"JSON Parser: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    for typ, frame in SAMPLE_JSON.items():
+        frames_typ = [bytearray(frame)]
+        old = bench(decode_json_message, frames_typ, number)
+        new = bench(decode_json_frame, frames_typ, number)
+        print(f"  {typ:8} decode_json_message {old:10,.0f}/s  decode_json_frame {new:10,.0f}/s  ({new / old:.2f}x)")
+    burst = [bytearray(frame) for frame in SAMPLE_JSON.values()]
+    for decoder in (decode_json_message, decode_json_frame):
+        peak, blocks = burst_memory(decoder, burst)
+        print(f"  Konfig-Burst x100 {decoder.__name__:20}: Spitze {peak:8,} Bytes, {blocks:6,} Bloecke gehalten")
+
+    #FCS fuer einen ganzen Mitschnitt, ein Teil der Frames ist kaputt
+    capture = []
+    for i in range(10000):
+        frame = bytearray(SAMPLE_FRAMES[i % len(SAMPLE_FRAMES)])
+        if i % 7 == 0:
+            frame[10] ^= 0x01
+        capture.append(bytes(frame))
+    buffer, offsets = pack_frames(capture)
+    expected = fcs_single(capture)
+
+    #zu kurze Frames, der letzte leer, beide Wege muessen False liefern
+    short = pack_frames(capture[:3] + [b'@', b''])
+    if check_fcs_batch(*short, use_numpy=False) != expected[:3] + [False, False]:
+        raise SystemExit("check_fcs_batch (sum) falsch fuer kurze Frames")
+    if load_numpy() is not None and check_fcs_batch(*short) != expected[:3] + [False, False]:
+        raise SystemExit("check_fcs_batch (numpy) falsch fuer kurze Frames")
+    if check_fcs_batch(buffer, offsets, use_numpy=False) != expected:
+        raise SystemExit("check_fcs_batch (sum) weicht von calc_fcs ab")
+    if load_numpy() is not None and check_fcs_batch(buffer, offsets) != expected:
+        raise SystemExit("check_fcs_batch (numpy) weicht von calc_fcs ab")
+
+    single = len(capture) / min(timeit.repeat(lambda: fcs_single(capture), number=1, repeat=5))
+    print(f"calc_fcs pro Frame:    {single:12,.0f} frames/s")
+    fallback = len(capture) / min(timeit.repeat(lambda: check_fcs_batch(buffer, offsets, use_numpy=False), number=1, repeat=5))
+    print(f"check_fcs_batch sum(): {fallback:12,.0f} frames/s  ({fallback / single:.2f}x)")
+    if load_numpy() is not None:
+        vec = len(capture) / min(timeit.repeat(lambda: check_fcs_batch(buffer, offsets), number=1, repeat=5))
+        print(f"check_fcs_batch numpy: {vec:12,.0f} frames/s  ({vec / single:.2f}x)")
+
+def run_stage(func, items, repeat=5):
+    """func(items) bearbeitet alle items. Frames/s vom besten Lauf, dazu pro Frame die Spitze des Speichers
+    (was waehrend der Arbeit angelegt wird) und die danach noch belegten Bloecke, beides mit tracemalloc."""
+    n = len(items)
+    best = min(timeit.repeat(lambda: func(items), number=1, repeat=repeat))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    base = tracemalloc.get_traced_memory()[0]
+    result = func(items)
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return {"fps": round(n / best), "peak_bytes_per_frame": round((peak - base) / n, 1),
+            "blocks_per_frame": round(blocks / n, 3)}
+
+def suite_stages(frames, tmpdir):
+    """name -> (func, items), jede func arbeitet mit frischem Zustand, damit die Laeufe vergleichbar sind."""
+    from meshcom_dedup import DedupCache
+    from meshcom_frames import decode_frame, FRAME_TYPES
+    from meshcom_store import MessageStore
+    from meshcom_capture import CaptureWriter
+    from meshcom_heard import HeardTable
+    from meshcom_archive import ArchiveWriter, zstandard
+
+    frames = [bytearray(f) for f in frames]  # BLE liefert bytearray
+    records = [decode_frame(f) for f in frames]
+    stages = {"decode mixed": (lambda items: [decode_frame(f) for f in items], frames)}
+    for prefix, name in FRAME_TYPES.items():
+        subset = [f for f in frames if f[:2] == prefix]
+        if subset:
+            stages[f"decode {name}"] = (lambda items: [decode_frame(f) for f in items], subset)
+
+    def dedupe(items):
+        cache = DedupCache()
+        return [cache.is_duplicate(f) for f in items]
+    stages["dedupe"] = (dedupe, frames)
+
+    def heard(items):
+        table = HeardTable()
+        for record in items:
+            table.update(record, 0.0)
+        return table
+    stages["heard"] = (heard, records)
+
+    def fresh(name):
+        path = os.path.join(tmpdir, name)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+        return path
+
+    def store(items):
+        #bis close() alles geschrieben ist, also inklusive SQLite Commit
+        db = MessageStore(fresh("bench.db"))
+        for record in items:
+            db.add(record, 1.0)
+        db.close()
+    stages["store sqlite"] = (store, records)
+
+    def capture(items):
+        writer = CaptureWriter(fresh("bench.cap"))
+        for frame in items:
+            writer.write(frame, 1)
+        writer.close()
+    stages["store capture"] = (capture, frames)
+
+    if zstandard is not None:
+        def archive(items):
+            with ArchiveWriter(fresh("bench.mca"), level=3) as writer:
+                for record in items:
+                    writer.add(record, 1.0)
+        stages["store archive"] = (archive, [r for r in records if not isinstance(r, DecodeError)])
+    return stages
+
+def git_revision():
+    try:
+        done = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=HERE)
+        return done.stdout.strip() or None
+    except OSError:
+        return None
+
+def last_result(history, count, seed):
+    """Letzter Eintrag mit gleichem count und seed, sonst None."""
+    last = None
+    try:
+        with open(history, "r", encoding="utf-8") as file:
+            for line in file:
+                entry = json.loads(line)
+                if entry.get("count") == count and entry.get("seed") == seed:
+                    last = entry
+    except FileNotFoundError:
+        pass
+    return last
+
+def suite(count, seed, history=BENCH_HISTORY, repeat=5):
+    """Dekodieren, Duplikate und Speichern auf synthetischen Frames, Ergebnis wird an history angehaengt
+    und mit dem letzten Lauf verglichen."""
+    import tempfile
+    from meshcom_synth import sample_frames
+
+    frames = sample_frames(count, seed)
+    previous = last_result(history, count, seed)
+    entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": git_revision(), "python": sys.version.split()[0],
+             "count": count, "seed": seed, "results": {}}
+    print(f"{count:,} synthetische Frames, seed {seed}" +
+          (f", Vergleich mit {previous['git']} vom {previous['time']}" if previous else ""))
+    print(f"{'Stufe':16} {'frames/s':>12} {'Bytes/Frame':>12} {'Bloecke/Frame':>14}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, (func, items) in suite_stages(frames, tmpdir).items():
+            result = run_stage(func, items, repeat)
+            entry["results"][name] = result
+            line = (f"{name:16} {result['fps']:12,} {result['peak_bytes_per_frame']:12,.1f} "
+                    f"{result['blocks_per_frame']:14.3f}")
+            old = (previous or {}).get("results", {}).get(name)
+            if old:
+                change = result["fps"] / old["fps"] - 1
+                line += f"  {change:+6.1%}" + ("  <-- langsamer" if change < -REGRESSION else "")
+            print(line)
+
+    with open(history, "a", encoding="utf-8") as file:
+        file.write(json.dumps(entry) + "\n")
+    print(f"Verlauf: {history}")
+    return entry
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks fuer Decoder, Duplikatfilter und Speicher")
+    parser.add_argument("mode", nargs="?", choices=("micro", "suite"), default="micro")
+    parser.add_argument("--count", type=int, default=20000, help="Anzahl synthetischer Frames (suite)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--history", default=BENCH_HISTORY)
+    args = parser.parse_args()
+
+    if args.mode == "suite":
+        suite(args.count, args.seed, args.history)
+    else:
+        micro()
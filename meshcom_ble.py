@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_ble.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Dauerhafte BLE Verbindung zu einem MeshCom Node.
+    Statt fuer jede Nachricht neu zu verbinden (connect + service discovery dauern auf dem Pi 5 Sekunden)
+    haelt BleSession die Verbindung offen, verbindet nach einem Abbruch mit exponentiellem Backoff
+    und Jitter neu und schickt danach wieder HELLO, damit der Node weiter redet.
+    Nach dem HELLO kommt der Konfig-Burst, erst mit CONFFIN ist der Node bereit: ready wird gesetzt und
+    gewartete send() Aufrufe gehen sofort raus. Mit profile (meshcom_profile.py) wird der Burst mitgeschrieben.
+    Die JSON Frames dekodiert nur die Pipeline, meshcom_events.session_events() reicht sie an die Session.
+MC FW: MeshCom 4.34v (build: Mar 22 2025 / 07:01:38)
+MC HW: TLORA_V2_1_1p6 / Heltec v3
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import random
+import time
+from bleak import BleakClient
+
+write_char_uuid = "6e400002-b5a3-f393-e0a9-e50e24dcca9e" # UUID_Char_WRITE
+read_char_uuid =  "6e400003-b5a3-f393-e0a9-e50e24dcca9e" # UUID_Char_NOTIFY
+hello_byte = bytes([0x04, 0x10, 0x20, 0x30])
+
+def encode_text_message(message):
+    """Textnachricht fuer den Node: Laenge + 0xA0 + UTF-8, z.B. '{TEST}Hallo'"""
+    byte_array = message.encode('utf-8')
+    laenge = len(byte_array) + 2
+    return laenge.to_bytes(1, 'big') + bytes([0xA0]) + byte_array
+
+class BleSession:
+    """Eine dauerhafte Verbindung zu einem Node, wird mit run() als Task gestartet."""
+
+    def __init__(self, address, on_notify=None, min_backoff=1.0, max_backoff=60.0, connect_timeout=20.0,
+                 profile=None, ready_timeout=15.0):
+        self.address = address
+        self.on_notify = on_notify
+        self.profile = profile
+        self.ready_timeout = ready_timeout  # aeltere Firmware ohne CONFFIN, dann eben nach dieser Zeit
+        self.ready = asyncio.Event()
+        self.time_to_ready = None
+        self._t_hello = None
+        self._ready_timer = None
+        self._conffin_early = False
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.client = None
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+        self._disconnected = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._closing = False
+
+    def _on_disconnect(self, client):
+        self.connected.clear()
+        self.ready.clear()
+        if self._ready_timer is not None:
+            self._ready_timer.cancel()
+        self._disconnected.set()
+
+    def _mark_ready(self):
+        if self.ready.is_set():
+            return
+        if not self.connected.is_set():
+            #CONFFIN kam noch waehrend _connect(), client ist noch nicht gesetzt
+            self._conffin_early = True
+            return
+        if self._ready_timer is not None:
+            self._ready_timer.cancel()
+        self.time_to_ready = time.monotonic() - self._t_hello
+        self.ready.set()
+
+    def _notify(self, characteristic, data):
+        if self.on_notify is not None:
+            self.on_notify(characteristic, data)
+
+    def on_event(self, event):
+        """JsonEvent dieses Nodes, wie ihn die Pipeline dekodiert hat: Konfig-Burst ins Profil, CONFFIN -> ready.
+        Im notification Callback wird nichts geparst, siehe meshcom_events.session_events()."""
+        if self.profile is not None:
+            self.profile.on_event(event)
+        if event.typ == "CONFFIN":
+            self._mark_ready()
+
+    def backoff(self, attempt):
+        """Exponentieller Backoff mit vollem Jitter, damit mehrere Sessions nicht gleichzeitig anklopfen."""
+        delay = min(self.max_backoff, self.min_backoff * (2 ** attempt))
+        return random.uniform(self.min_backoff / 2, delay)
+
+    async def _connect(self):
+        client = BleakClient(self.address, disconnected_callback=self._on_disconnect, timeout=self.connect_timeout)
+        await client.connect()
+        try:
+            await client.start_notify(read_char_uuid, self._notify)
+
+            #HELLO nach jedem (Re)connect, sonst schweigt der Node
+            if self.profile is not None:
+                self.profile.start_burst()
+            self._t_hello = time.monotonic()
+            self._conffin_early = False
+            await client.write_gatt_char(write_char_uuid, hello_byte)
+        except Exception:
+            await client.disconnect()
+            raise
+        return client
+
+    async def run(self):
+        attempt = 0
+        while not self._closing:
+            try:
+                self._disconnected.clear()
+                self.client = await self._connect()
+            except Exception as e:
+                delay = self.backoff(attempt)
+                attempt += 1
+                print(f"Verbindung zu {self.address} fehlgeschlagen: {e}, neuer Versuch in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if self._closing:
+                #close() kam waehrend connect(), der Client war da noch nicht gesetzt und bliebe sonst verbunden
+                await self.client.disconnect()
+                break
+
+            if attempt or self.reconnects:
+                print(f"Wieder verbunden mit {self.address}")
+            else:
+                print(f"Connected to: {self.address}")
+            attempt = 0
+            self.connected.set()
+            if self._conffin_early:
+                self._mark_ready()
+            else:
+                self._ready_timer = asyncio.get_running_loop().call_later(self.ready_timeout, self._mark_ready)
+
+            await self._disconnected.wait()
+            if not self._closing:
+                self.reconnects += 1
+                print(f"Verbindung zu {self.address} verloren, verbinde neu ...")
+
+    async def send(self, data, timeout=None):
+        """Schreibt auf die WRITE Characteristic, wartet notfalls auf Verbindung und CONFFIN."""
+        await asyncio.wait_for(self.ready.wait(), timeout)
+        async with self._write_lock:
+            await self.client.write_gatt_char(write_char_uuid, data)
+
+    async def send_text(self, message, timeout=None):
+        await self.send(encode_text_message(message), timeout)
+
+    async def close(self):
+        self._closing = True
+        self._disconnected.set()
+        if self.client is not None and self.client.is_connected:
+            await self.client.disconnect()
+        if self.profile is not None:
+            await self.profile.flush()
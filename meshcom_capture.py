@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_capture.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Mitschnitt der rohen BLE notifications und Wiedergabe ohne Funkgeraet.
+    Die Frames werden an eine Binaerdatei angehaengt, jeder Eintrag ist <qI (Zeit in ns, Laenge) + Frame.
+    Geschrieben wird gepuffert, der Puffer wird im Hintergrund gesammelt geschrieben und mit fsync gesichert.
+    Zum Abspielen wird die Datei mit mmap eingeblendet, die Frames gehen in Originalgeschwindigkeit
+    oder so schnell wie moeglich wieder in den Decoder.
+
+    $ python3 meshcom_capture.py replay mc.cap            (Originalgeschwindigkeit, Ausgabe wie MeshCom-Read)
+    $ python3 meshcom_capture.py replay mc.cap --speed 0  (so schnell wie moeglich)
+    $ python3 meshcom_capture.py bench mc.cap             (Decoder Frames/s ueber den Mitschnitt)
+    $ python3 meshcom_capture.py selftest
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import mmap
+import os
+import time
+from struct import Struct
+
+MAGIC = b"MCCAP1\n\x00"
+RECORD = Struct('<qI')  # Empfangszeit time_ns(), Laenge des Frames
+
+class CaptureWriter:
+    """Haengt Frames an die Mitschnittdatei an, write() kopiert nur in den Puffer."""
+
+    def __init__(self, path, flush_interval=1.0, max_buffer=64 * 1024):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.frames = 0
+        self._buf = bytearray()
+        self._full = asyncio.Event()
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab", buffering=0)
+        if new:
+            self._file.write(MAGIC)
+
+    def write(self, data, t_ns=None):
+        self._buf += RECORD.pack(t_ns or time.time_ns(), len(data))
+        self._buf += data
+        self.frames += 1
+        if len(self._buf) >= self.max_buffer:
+            self._full.set()
+
+    def _take(self):
+        """Puffer abhaengen, nur im Event Loop Thread, dort laeuft auch write()."""
+        buf, self._buf = self._buf, bytearray()
+        return buf
+
+    def _write_out(self, buf):
+        """Schreibt einen abgehaengten Puffer und sichert mit fsync, laeuft im Thread."""
+        if buf:
+            self._file.write(buf)
+            os.fsync(self._file.fileno())
+
+    def flush(self):
+        self._write_out(self._take())
+
+    async def run(self):
+        """Hintergrund-Task: flush im Intervall oder wenn der Puffer voll ist."""
+        pending = None
+        try:
+            while True:
+                #asyncio.wait statt wait_for, wait_for kann in Python 3.11 ein cancel() verschlucken
+                waiter = asyncio.ensure_future(self._full.wait())
+                try:
+                    await asyncio.wait([waiter], timeout=self.flush_interval)
+                finally:
+                    waiter.cancel()
+                self._full.clear()
+                #der Thread bekommt nur den abgehaengten Puffer, write() fuellt derweil einen neuen
+                pending = asyncio.ensure_future(asyncio.to_thread(self._write_out, self._take()))
+                await asyncio.shield(pending)
+        finally:
+            #ein laufender Schreibvorgang muss fertig sein, bevor close() den Rest anhaengt
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def iter_capture(path, copy=False):
+    """Liefert (time_ns, frame) fuer jeden Eintrag.
+
+    frame ist eine memoryview in das mmap und nur bis zum naechsten Eintrag gueltig, danach ist sie freigegeben.
+    Wer Frames behalten will, kopiert oder nimmt copy=True, dann kommt jeder Frame als bytes.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size <= len(MAGIC):
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} ist kein MeshCom Mitschnitt")
+            mv = memoryview(mm)
+            try:
+                pos = len(MAGIC)
+                size = len(mm)
+                while pos + RECORD.size <= size:
+                    t_ns, length = RECORD.unpack_from(mm, pos)
+                    pos += RECORD.size
+                    if pos + length > size:
+                        break  # abgeschnittener letzter Eintrag, z.B. nach Stromausfall
+                    if copy:
+                        yield t_ns, bytes(mv[pos:pos + length])
+                    else:
+                        frame = mv[pos:pos + length]
+                        try:
+                            yield t_ns, frame
+                        finally:
+                            #auch bei break oder Exception beim Aufrufer, sonst laesst sich das mmap nicht schliessen
+                            frame.release()
+                    pos += length
+            finally:
+                mv.release()
+
+async def replay(path, feed, speed=1.0):
+    """Spielt den Mitschnitt in feed(sender, data) ab, speed=0 heisst so schnell wie moeglich."""
+    start_wall = None
+    start_rec = None
+    count = 0
+    for t_ns, frame in iter_capture(path):
+        if speed:
+            if start_rec is None:
+                start_rec = t_ns
+                start_wall = time.monotonic()
+            due = start_wall + (t_ns - start_rec) / 1e9 / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        #bytearray wie bei bleak, die memoryview darf das mmap nicht ueberleben
+        feed("replay", bytearray(frame))
+        count += 1
+        if count % 100 == 0:
+            #Decoder zum Zug kommen lassen, sonst laeuft die Eingangsqueue ueber
+            await asyncio.sleep(0)
+    return count
+
+def bench(path):
+    from meshcom_frames import decode_frame
+
+    frames = [bytearray(frame) for _, frame in iter_capture(path)]
+    if not frames:
+        print("Mitschnitt ist leer")
+        return
+    start = time.perf_counter()
+    for frame in frames:
+        decode_frame(frame)
+    elapsed = time.perf_counter() - start
+    print(f"{len(frames)} Frames in {elapsed:.3f}s, {len(frames) / elapsed:,.0f} frames/s")
+
+def selftest():
+    """Mitschnitt schreiben, vorzeitig aus iter_capture aussteigen und den letzten Frame behalten."""
+    import sys
+    import tempfile
+
+    unraisable = []
+    sys.unraisablehook = lambda info: unraisable.append(info.exc_value)
+    frames = [bytes([i]) * (10 + i) for i in range(50)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "selftest.cap")
+        writer = CaptureWriter(path)
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+
+        assert [bytes(f) for _, f in iter_capture(path)] == frames, "Frames weichen ab"
+
+        #memoryview: nach break ist der Frame freigegeben, das mmap wird trotzdem sauber geschlossen
+        for i, (_, kept) in enumerate(iter_capture(path)):
+            if i == 10:
+                break
+        try:
+            bytes(kept)
+            raise AssertionError("memoryview nach break noch lesbar")
+        except ValueError:
+            pass
+
+        #auch mit einer Exception beim Aufrufer
+        try:
+            for i, (_, kept) in enumerate(iter_capture(path)):
+                if i == 20:
+                    raise KeyError(i)
+        except KeyError:
+            pass
+
+        #copy=True: der behaltene Frame bleibt gueltig
+        for i, (_, kept) in enumerate(iter_capture(path, copy=True)):
+            if i == 30:
+                break
+        assert kept == frames[30], "behaltener Frame weicht ab"
+    sys.unraisablehook = sys.__unraisablehook__
+    assert not unraisable, f"beim Schliessen: {unraisable}"
+    print("Selbsttest ok")
+
+async def replay_main(path, speed):
+    from meshcom_pipeline import FramePipeline
+
+    def output(sender, raw, decoded):
+        print(decoded if decoded is not None else "Unbekannter Nachrichtentyp.")
+
+    pipeline = FramePipeline(output)
+    pipeline.start()
+    count = await replay(path, pipeline.feed, speed)
+    await pipeline.stop()
+    print(f"{count} Frames abgespielt, verworfen: {pipeline.dropped}")
+    print(pipeline.latency.summary())
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MeshCom Mitschnitt abspielen")
+    parser.add_argument("command", choices=["replay", "bench", "selftest"])
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = Originalgeschwindigkeit, 0 = so schnell wie moeglich")
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        selftest()
+    elif args.command == "bench":
+        bench(args.path)
+    else:
+        asyncio.run(replay_main(args.path, args.speed))
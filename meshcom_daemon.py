@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_daemon.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Langlaufender Dienst, der die BLE Verbindung zu den MeshCom Nodes offen haelt
+    und Sendeauftraege von lokalen Programmen ueber einen Unix Socket annimmt.
+    Pro Node gibt es genau eine BleSession, eine Nachricht kostet dann nur noch den GATT write.
+
+    Vor jeder Session sitzt ein OutboundScheduler (meshcom_scheduler.py), der nach Prioritaet
+    und LoRa Duty-Cycle sendet und gleichartige Nachrichten zusammenfasst.
+    Die notifications der Nodes laufen durch die FramePipeline in den AckTracker (meshcom_acks.py),
+    der die ACKs den gesendeten Nachrichten zuordnet.
+
+    Protokoll: eine JSON Zeile pro Auftrag, eine JSON Zeile als Antwort
+        -> {"node": "48:CA:43:3A:83:AD", "dst": "TEST", "msg": "Hallo"}
+        <- {"ok": true, "depth": 1}
+        -> {"cmd": "stats"}
+        <- {"ok": true, "stats": {"48:CA:43:3A:83:AD": {"depth": 0, "sent": 1, ...}}, "acks": {...}}
+    "node" ist optional, dann wird der Standard-Node des Dienstes verwendet.
+    Optional "prio": "high" | "normal" | "low" und "coalesce": Schluessel, z.B. "wx-20".
+    Die Antwort kommt, sobald der Auftrag eingereiht ist, nicht erst nach dem Senden.
+    Mit MESHCOM_METRICS_PORT gibt es Metriken im Prometheus Format (meshcom_metrics.py).
+
+    $ python3 meshcom_daemon.py 48:CA:43:3A:83:AD
+    $ python3 MeshCom-Write.py     (nimmt den Dienst, wenn er laeuft)
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+
+SOCKET_PATH = os.environ.get("MESHCOM_SOCKET", "/tmp/meshcom.sock")
+METRICS_PORT = os.environ.get("MESHCOM_METRICS_PORT") # z.B. 9465, nicht gesetzt = keine Metriken
+SEND_TIMEOUT = 30 # Sekunden, die ein Auftrag auf eine Verbindung wartet
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+class SessionManager:
+    """Haelt pro Node eine BleSession, Sessions werden beim ersten Auftrag gestartet."""
+
+    def __init__(self, default_node, pipeline=None, acks=None):
+        self.default_node = default_node
+        self.pipeline = pipeline
+        self.acks = acks
+        self.sessions = {}
+        self.schedulers = {}
+        self.tasks = []
+
+    def session(self, address):
+        from meshcom_ble import BleSession
+        from meshcom_profile import NodeProfile
+        from meshcom_scheduler import OutboundScheduler
+
+        address = address.upper()
+        if address not in self.sessions:
+            #Auftraege warten bis CONFFIN und gehen dann sofort raus, das Profil kommt aus dem Cache
+            #Absender ist die Adresse, damit session_events() die JSON Frames der richtigen Session gibt
+            on_notify = None
+            if self.pipeline is not None:
+                on_notify = lambda characteristic, data: self.pipeline.feed(address, data)
+            session = BleSession(address, on_notify=on_notify, profile=NodeProfile(address))
+
+            async def send(message):
+                await session.send_text(message, timeout=SEND_TIMEOUT)
+                if self.acks is not None:
+                    dst, text = message[1:].split("}", 1)
+                    self.acks.register(dst, text)
+
+            scheduler = OutboundScheduler(send)
+            self.sessions[address] = session
+            self.schedulers[address] = scheduler
+            self.tasks.append(asyncio.create_task(session.run()))
+            self.tasks.append(asyncio.create_task(scheduler.run()))
+        return self.sessions[address]
+
+    async def handle_request(self, request):
+        if request.get("cmd") == "stats":
+            reply = {"ok": True, "stats": {node: s.snapshot() for node, s in self.schedulers.items()}}
+            reply["nodes"] = {node: {"ready": s.ready.is_set(), "time_to_ready": s.time_to_ready,
+                                     "profile": s.profile.summary()} for node, s in self.sessions.items()}
+            if self.acks is not None:
+                reply["acks"] = self.acks.snapshot()
+            return reply
+
+        node = request.get("node") or self.default_node
+        if not node:
+            raise ValueError("kein Node angegeben")
+        self.session(node)
+        scheduler = self.schedulers[node.upper()]
+
+        message = "{" + request["dst"] + "}" + request["msg"]
+        priority = PRIORITIES[request.get("prio", "normal")]
+        if not scheduler.submit(message, priority, request.get("coalesce")):
+            raise RuntimeError("Sendequeue voll, Nachricht verworfen")
+        return {"ok": True, "depth": scheduler.depth}
+
+    async def close(self):
+        for session in self.sessions.values():
+            await session.close()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def handle_client(self, reader, writer):
+        #ein Client darf mehrere Auftraege hintereinander schicken
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = await self.handle_request(json.loads(line))
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e) or type(e).__name__}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+async def request_daemon(request, socket_path=SOCKET_PATH):
+    """Client Seite: ein Auftrag an den Dienst, wirft OSError wenn kein Dienst laeuft."""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+    finally:
+        writer.close()
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error"))
+    return reply
+
+async def send_via_daemon(dst, msg, node=None, prio=None, coalesce=None, socket_path=SOCKET_PATH):
+    request = {"dst": dst, "msg": msg}
+    if node:
+        request["node"] = node
+    if prio:
+        request["prio"] = prio
+    if coalesce:
+        request["coalesce"] = coalesce
+    return await request_daemon(request, socket_path)
+
+async def serve(default_node, socket_path=SOCKET_PATH, own_call=None, metrics_port=METRICS_PORT):
+    from meshcom_acks import AckTracker
+    from meshcom_dedup import DedupCache
+    from meshcom_events import session_events
+    from meshcom_pipeline import FramePipeline
+
+    acks = AckTracker(own_call=own_call)
+
+    def dispatch(sender, raw, decoded):
+        #Konfig-Burst und CONFFIN an die Session des Nodes, ACKs an den AckTracker
+        to_session(sender, decoded)
+        acks.on_frame(decoded)
+
+    pipeline = FramePipeline(dispatch, dedup=DedupCache())
+    pipeline.start()
+    manager = SessionManager(default_node, pipeline, acks)
+    to_session = session_events(manager.sessions)
+    if default_node:
+        #gleich verbinden, damit der erste Auftrag nicht warten muss
+        manager.session(default_node)
+
+    metrics_server = None
+    if metrics_port:
+        from meshcom_metrics import (MetricsRegistry, MetricsServer, register_pipeline, register_links,
+                                     register_sending)
+
+        registry = MetricsRegistry()
+        register_pipeline(registry, pipeline)
+        register_links(registry, manager.sessions)
+        register_sending(registry, manager.schedulers, acks)
+        metrics_server = MetricsServer(registry, port=int(metrics_port))
+        await metrics_server.start()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(manager.handle_client, path=socket_path)
+    os.chmod(socket_path, 0o660)
+    print(f"MeshCom Dienst lauscht auf {socket_path}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    async with server:
+        await stop_event.wait()
+
+    await manager.close()
+    if metrics_server is not None:
+        await metrics_server.close()
+    await pipeline.stop(drain=False)
+    os.unlink(socket_path)
+
+if __name__ == "__main__":
+    #MAC_ADDRESS = "D4:D4:DA:9E:B5:62" #T-LoRa
+    MAC_ADDRESS = "48:CA:43:3A:83:AD" #Heltec v3
+
+    node = sys.argv[1] if len(sys.argv) > 1 else MAC_ADDRESS
+    own_call = os.environ.get("MESHCOM_CALL") # z.B. DK5EN-99, nur eigene Echos zaehlen
+    asyncio.run(serve(node, own_call=own_call))
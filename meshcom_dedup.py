@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_dedup.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Doppelte Mesh Nachrichten erkennen, bevor sie dekodiert werden.
+    Dieselbe Nachricht kommt ueber verschiedene Hops, als Wiederholung oder als @A Echo mehrfach an.
+    Schluessel ist (payload_type, msg_id) aus dem 7 Byte Header, gelesen mit HEADER.unpack_from,
+    Path, Ziel und Text werden fuer Duplikate gar nicht erst angefasst.
+    Der Cache ist ein Zeitfenster in Empfangsreihenfolge (FIFO, ein Treffer verlaengert nichts) mit fester
+    Maximalgroesse, das legt den Speicher fest (gemessen ca. 220 Bytes pro Eintrag), falsch-positive Treffer
+    gibt es im Gegensatz zu einem Bloom Filter nicht.
+    Ein Frame, der sich nicht dekodieren laesst, wird mit forget() wieder ausgetragen, damit eine gute
+    Wiederholung derselben Nachricht nicht als Duplikat verworfen wird.
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+from collections import OrderedDict
+from time import monotonic
+from meshcom_frames import HEADER, HEADER_OFFSET, BODY_OFFSET
+
+def frame_key(frame):
+    """(payload_type, msg_id) eines Binaerframes, None fuer alles andere (z.B. D{ JSON)."""
+    if len(frame) < BODY_OFFSET or frame[0] != 0x40:
+        return None
+    payload_type, msg_id, _ = HEADER.unpack_from(frame, HEADER_OFFSET)
+    return (payload_type, msg_id)
+
+class DedupCache:
+    """Merkt sich Schluessel fuer window Sekunden, hoechstens max_entries Stueck."""
+
+    def __init__(self, max_entries=4096, window=600.0):
+        self.max_entries = max_entries
+        self.window = window
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._seen = OrderedDict()  # Schluessel -> erste Empfangszeit, aelteste vorne
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _expire(self, now):
+        seen = self._seen
+        limit = now - self.window
+        while seen:
+            key, t_first = next(iter(seen.items()))
+            if t_first >= limit and len(seen) <= self.max_entries:
+                break
+            seen.popitem(last=False)
+            self.evictions += 1
+
+    def check(self, key, now=None):
+        """True wenn der Schluessel im Zeitfenster schon da war, sonst wird er eingetragen."""
+        if now is None:
+            now = monotonic()
+        seen = self._seen
+        # abgelaufene Eintraege vorne gelegentlich wegraeumen, kostet nur einen Blick auf das erste Element
+        if seen and now - next(iter(seen.values())) >= self.window:
+            self._expire(now)
+        t_first = seen.get(key)
+        if t_first is not None and now - t_first < self.window:
+            self.hits += 1
+            return True
+        if t_first is not None:
+            del seen[key]
+        seen[key] = now
+        self.misses += 1
+        if len(seen) > self.max_entries:
+            self._expire(now)
+        return False
+
+    def forget(self, key):
+        """Schluessel wieder austragen, z.B. wenn der erste Frame kaputt war."""
+        self._seen.pop(key, None)
+
+    def is_duplicate(self, frame, now=None):
+        """Fuer rohe Frames, JSON Frames sind nie Duplikate."""
+        key = frame_key(frame)
+        if key is None:
+            return False
+        return self.check(key, now)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._seen),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_discovery.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: MeshCom Nodes per BLE finden, ohne jedes Mal das volle Scan-Fenster abzuwarten.
+    stream_nodes() liefert jeden Node, sobald seine Advertisements reinkommen, gefiltert auf den
+    Nordic UART Service (6e400001-...), den alle MeshCom Nodes anbieten.
+    discover(match) hoert auf, sobald der gesuchte Node (Adresse, Name oder Rufzeichen) auftaucht.
+    Jeder gefundene Node landet mit letztem RSSI in einer Registry Datei, resolve_node() schaut dort
+    zuerst nach, die Lese- und Schreib-Tools koennen dann z.B. "DK5EN-99" statt der MAC angeben.
+
+    $ python3 meshcom_discovery.py              alle Nodes, 10s
+    $ python3 meshcom_discovery.py DK5EN-99     bis DK5EN-99 gefunden ist
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from contextlib import aclosing
+from meshcom_profile import PROFILE_DIR
+
+NUS_SERVICE_UUID = "6e400001-b5a3-f393-e0a9-e50e24dcca9e"  # Nordic UART Service
+REGISTRY_FILE = os.environ.get("MESHCOM_NODES", os.path.join(PROFILE_DIR, "nodes.json"))
+SCAN_TIMEOUT = 10.0
+MAC_ADDRESS = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+
+class NodeRegistry:
+    """Adresse -> {"name", "rssi", "last_seen"}, als JSON auf der Platte."""
+
+    def __init__(self, path=REGISTRY_FILE):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                self.nodes = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.nodes = {}
+
+    def seen(self, address, name, rssi, now=None):
+        self.nodes[address] = {"name": name, "rssi": rssi, "last_seen": now or time.time()}
+
+    def find(self, match):
+        """Adresse zu MAC, Name ('MC-83ac-DK5EN-99') oder Rufzeichen ('DK5EN-99'), zuletzt gesehener gewinnt."""
+        match = match.upper()
+        best = None
+        for address, node in self.nodes.items():
+            name = (node.get("name") or "").upper()
+            if address.upper() == match or name == match or name.endswith("-" + match):
+                if best is None or node["last_seen"] > self.nodes[best]["last_seen"]:
+                    best = address
+        return best
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self.nodes, file, indent=1)
+        os.replace(tmp, self.path)
+
+def _is_meshcom(name, advertisement_data):
+    uuids = advertisement_data.service_uuids or ()
+    return NUS_SERVICE_UUID in (u.lower() for u in uuids) or name.startswith("MC-")
+
+async def stream_nodes(timeout=SCAN_TIMEOUT):
+    """Async Generator, (address, name, rssi) fuer jeden MeshCom Node, jeder nur einmal."""
+    from bleak import BleakScanner
+
+    queue = asyncio.Queue()
+    seen = set()
+
+    def detection_callback(device, advertisement_data):
+        #name kann None sein, dann steht er manchmal nur in den Advertisement Daten
+        name = device.name or advertisement_data.local_name or ""
+        if device.address in seen or not _is_meshcom(name, advertisement_data):
+            return
+        seen.add(device.address)
+        queue.put_nowait((device.address, name, advertisement_data.rssi))
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    async with BleakScanner(detection_callback, service_uuids=[NUS_SERVICE_UUID]):
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return
+            try:
+                yield await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+async def discover(match=None, timeout=SCAN_TIMEOUT, registry=None):
+    """Alle Nodes im Zeitfenster, oder nur der erste passende, sobald er da ist. Traegt alles in die Registry ein."""
+    registry = registry or NodeRegistry()
+    found = []
+    try:
+        #aclosing, damit der Scanner beim fruehen return sofort stoppt und nicht erst beim Aufraeumen
+        async with aclosing(stream_nodes(timeout)) as nodes:
+            async for address, name, rssi in nodes:
+                registry.seen(address, name, rssi)
+                found.append((address, name, rssi))
+                if match is not None and registry.find(match) == address:
+                    return [(address, name, rssi)]
+    finally:
+        registry.save()
+    return [] if match is not None else found
+
+async def resolve_node(match, timeout=SCAN_TIMEOUT):
+    """MAC Adresse direkt, sonst aus der Registry, erst wenn beides nichts liefert wird gescannt."""
+    if MAC_ADDRESS.match(match):
+        return match.upper()
+    address = NodeRegistry().find(match)
+    if address is not None:
+        return address
+    found = await discover(match, timeout)
+    if not found:
+        raise LookupError(f"Node {match} nicht gefunden")
+    return found[0][0]
+
+async def main(match, timeout):
+    registry = NodeRegistry()
+    start = time.perf_counter()
+    if match is None:
+        async for address, name, rssi in stream_nodes(timeout):
+            registry.seen(address, name, rssi)
+            print(f"{time.perf_counter() - start:5.2f}s Device {name}, Address: {address}, RSSI: {rssi}")
+        registry.save()
+    else:
+        found = await discover(match, timeout, registry)
+        for address, name, rssi in found:
+            print(f"{time.perf_counter() - start:5.2f}s Device {name}, Address: {address}, RSSI: {rssi}")
+        if not found:
+            print(f"{match} nicht gefunden")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MeshCom Nodes per BLE finden")
+    parser.add_argument("match", nargs="?", help="Adresse, Name oder Rufzeichen, dann Abbruch beim ersten Treffer")
+    parser.add_argument("--timeout", type=float, default=SCAN_TIMEOUT)
+    args = parser.parse_args()
+    asyncio.run(main(args.match, args.timeout))
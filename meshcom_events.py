@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_events.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Verteilt die JSON Frames des Nodes (D{...}) nach ihrem TYP auf Handler.
+    Ein Handler wird mit dem Decorator eingetragen, Nachschlagen ist ein dict Zugriff statt einer elif Kette:
+
+    json_handlers = TypDispatcher()
+
+    @json_handlers.register("MH")
+    def on_mh(sender, event):
+        print(event)
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+from meshcom_records import JsonEvent
+
+class TypDispatcher:
+    """TYP -> handler(sender, event), unbekannte oder nicht registrierte Typen gehen an default."""
+
+    def __init__(self, default=None):
+        self.handlers = {}
+        self.default = default
+
+    def register(self, *typs):
+        def decorator(func):
+            for typ in typs:
+                self.handlers[typ] = func
+            return func
+        return decorator
+
+    def dispatch(self, sender, event):
+        """event ist ein JsonEvent aus meshcom_records.py."""
+        handler = self.handlers.get(event.typ, self.default)
+        if handler is not None:
+            handler(sender, event)
+
+def session_events(sessions):
+    """Fuer den dispatch der Pipeline: sessions ist {Absender: BleSession}, jeder dekodierte JsonEvent
+    geht an die Session seines Nodes. Ohne diesen Weg wird ready erst nach ready_timeout gesetzt."""
+    def handler(sender, decoded):
+        if isinstance(decoded, JsonEvent):
+            session = sessions.get(sender)
+            if session is not None:
+                session.on_event(decoded)
+    return handler
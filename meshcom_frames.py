@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_frames.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Decoder fuer die Frames, die ein MeshCom Node ueber BLE schickt.
+    Binaerframes beginnen mit '@' (@: Text, @! Position, @A ACK), JSON Frames mit 'D{'.
+    Wird von MeshCom-Read.py und den anderen Empfangswegen gemeinsam benutzt.
+    decode_frame liefert Records aus meshcom_records.py, die alten Decoder mit dicts bleiben als Referenz.
+MC FW: MeshCom 4.34v (build: Mar 22 2025 / 07:01:38)
+
+Frame Layout (little-endian):
+    [0]       '@'
+    [1:7]     <BIB  payload_type, msg_id, max_hop_raw (mesh_info << 4 | max_hop)
+    [7:]      path '>' dest ':' message (bzw. '*' bei Positionsmeldungen), 0x00
+    [-14:-1]  <BBBHBBBBI  zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms
+    FCS = Summe der Bytes [1:-11], MSB/LSB vertauscht
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+
+Disclaimer:
+This script is provided "as is", without warranty of any kind, express or implied.
+"""
+import json
+from struct import Struct, unpack
+from meshcom_records import TextFrame, AckFrame, JsonEvent, DecodeError
+
+try:
+    import orjson        # optional, schneller und nimmt memoryview direkt
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+#Vorkompilierte Strukturen, spart das Parsen des Formatstrings bei jedem Frame
+HEADER = Struct('<BIB')            # payload_type, msg_id, max_hop_raw
+TRAILER = Struct('<BBBHBBBBI')     # zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms
+ACK_ID = Struct('<I')
+
+HEADER_OFFSET = 1
+BODY_OFFSET = 7
+TRAILER_SIZE = 14                  # TRAILER.size + 1 Byte am Ende
+FCS_TAIL = 11                      # FCS laeuft ueber [1:-11]
+FRAME_TYPES = {b'@:': "text", b'@!': "position", b'@A': "ack", b'D{': "json"}  # erste zwei Bytes -> Typ
+
+_numpy = None
+
+def load_numpy():
+    """numpy erst beim ersten Bedarf laden (kostet beim Start ~80 ms), None wenn nicht installiert."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+def sender_of(path):
+    """Erstes Rufzeichen im Path, 'DK5EN-99,OE1XAR-12>' -> 'DK5EN-99'"""
+    if not path:
+        return None
+    end = len(path)
+    for sep in (",", ">"):
+        idx = path.find(sep)
+        if idx != -1 and idx < end:
+            end = idx
+    return path[:end] or None
+
+def calc_fcs(msg):
+    fcs = sum(msg)
+
+    # SWAP MSB/LSB
+    fcs = ((fcs & 0xFF00) >> 8) | ((fcs & 0xFF) << 8 )
+
+    #print("calc_fcs=" + hex(fcs))
+    return fcs
+
+def decode_json_message(byte_msg):
+    try:
+        json_str = byte_msg.rstrip(b'\x00').decode("utf-8")[1:]
+        return json.loads(json_str)
+
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        print(f"Fehler beim Dekodieren der JSON-Nachricht: {e}")
+        return None
+
+def decode_json_frame(byte_msg):
+    """Wie decode_json_message, aber ohne Zwischenkopien: 'D' und die 0x00 am Ende werden nur per Index ausgelassen."""
+    end = len(byte_msg)
+    while end and byte_msg[end - 1] == 0:
+        end -= 1
+    try:
+        if orjson is not None:
+            data = orjson.loads(memoryview(byte_msg)[1:end])
+        else:
+            data = json.loads(byte_msg[1:end])
+        return JsonEvent(data, byte_msg, 1, end)
+
+    except ValueError as e:   # JSONDecodeError und UnicodeDecodeError
+        return DecodeError(f"Fehler beim Dekodieren der JSON-Nachricht: {e}")
+
+def decode_udp_frame(byte_msg):
+    """JSON Datagramm vom Node (--extudp) oder JSON Zeile von der seriellen Konsole, als Record fuer decode_frame."""
+    try:
+        return JsonEvent(json.loads(byte_msg.decode("utf-8", errors="replace")), byte_msg, 0, len(byte_msg))
+
+    except json.JSONDecodeError as e:
+        return DecodeError(f"Fehler beim Dekodieren der UDP-Nachricht: {e}")
+
+def decode_binary_message(byte_msg):
+
+    # little-endian unpack
+    raw_header = byte_msg[1:7]
+    [payload_type, msg_id, max_hop_raw] = unpack('<BIB', raw_header)
+
+    #Bits schieben
+    max_hop = max_hop_raw & 0x0F
+    mesh_info = max_hop_raw >> 4
+
+    #Frame checksum berechnen
+    calced_fcs = calc_fcs(byte_msg[1:-11])
+
+    remaining_msg = byte_msg[7:].rstrip(b'\x00')  # Alles nach Hop
+
+    if byte_msg[:2] == b'@A':  # Prüfen, ob es sich umACK Frames handel
+
+       #remaining_msg = byte_msg[8:].rstrip(b'\x00')  # Alles nach Hop
+       message = remaining_msg.hex().upper()
+
+       #Etwas bit banging, weil die Binaerdaten am Ende immer gleich aussehen
+       #[zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms ] = unpack('<BBBHBBBBI', byte_msg[-14:-1])
+       [ack_id] = unpack('<I', byte_msg[-5:-1])
+
+       json_obj = {k: v for k, v in locals().items() if k in [
+          "payload_type",
+	        "msg_id",
+	        "max_hop",
+	        "mesh_info",
+	        "message",
+	        "ack_id",
+	        "calced_fcs" ]}
+
+       return json_obj
+
+    elif bytes(byte_msg[:2]) in {b'@:', b'@!'}:
+      #remaining_msg = byte_msg[7:]  # Alles nach Hop
+      # Extrahiere den Path
+
+      split_idx = remaining_msg.find(b'>')
+      if split_idx == -1:
+        return "Kein gültiges Routing-Format"
+
+      path = remaining_msg[:split_idx+1].decode("utf-8", errors="ignore")
+      remaining_msg = remaining_msg[split_idx + 1:]
+
+      # Extrahiere Dest-Type (`dt`)
+
+      if payload_type == 58:
+        split_idx = remaining_msg.find(b':')
+      elif payload_type == 33:
+        split_idx = remaining_msg.find(b'*')+1
+      else:
+        print(f"Payload type not matched! {payload_type}")
+
+      if split_idx == -1:
+         return "Destination not found"
+
+      dest = remaining_msg[:split_idx].decode("utf-8", errors="ignore")
+
+      message = remaining_msg[split_idx:remaining_msg.find(b'\00')].decode("utf-8", errors="ignore").strip()
+
+      #Etwas bit banging, weil die Binaerdaten am Ende immer gleich aussehen
+      [zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms ] = unpack('<BBBHBBBBI', byte_msg[-14:-1])
+
+      #Frame checksum checken
+      fcs_ok = (calced_fcs == fcs)
+
+      if message.startswith(":{CET}"):
+        dest_type = "Datum & Zeit Broadcast an alle"
+
+      elif path.startswith("response"):
+        dest_type = "user input response"
+
+      elif message.startswith("!"):
+        dest_type = "Positionsmeldung"
+
+      elif dest == "*":
+        dest_type = "Broadcast an alle"
+
+      elif dest.isdigit():
+        dest_type = f"Gruppennachricht an {dest}"
+
+      else:
+        dest_type = f"Direktnachricht an {dest}"
+
+      json_obj = {k: v for k, v in locals().items() if k in [
+          "payload_type",
+          "msg_id",
+          "max_hop",
+          "mesh_info",
+          "dest_type",
+          "path",
+          "dest",
+          "message",
+          "hardware_id",
+          "lora_mod",
+          "fcs",
+          "fcs_ok",
+          "fw",
+          "fw_subver",
+          "lasthw",
+          "time_ms",
+          "ending"
+          ]}
+
+      return json_obj
+
+    else:
+       return "Kein gueltiges Mesh-Format"
+
+def decode_binary_frame(byte_msg):
+    """Schneller Decoder fuer @: @! @A Frames, liefert dieselben Felder wie decode_binary_message,
+    aber als TextFrame/AckFrame und Fehler als DecodeError.
+
+    Arbeitet in einem Durchgang auf dem Originalpuffer: find() mit Start/Ende statt Slices,
+    unpack_from() statt unpack(byte_msg[a:b]) und memoryview nur dort, wo wirklich dekodiert wird.
+    """
+    n = len(byte_msg)
+    if n < BODY_OFFSET + TRAILER_SIZE:
+        return DecodeError("Frame zu kurz")
+    mv = memoryview(byte_msg)
+
+    payload_type, msg_id, max_hop_raw = HEADER.unpack_from(byte_msg, HEADER_OFFSET)
+
+    #Frame checksum berechnen, sum() laeuft in C und ist ueber bytes schneller als ueber memoryview
+    fcs_sum = sum(byte_msg[HEADER_OFFSET:n - FCS_TAIL])
+    calced_fcs = ((fcs_sum & 0xFF00) >> 8) | ((fcs_sum & 0xFF) << 8)
+
+    #Ende ohne die 0x00 Auffuellung, entspricht rstrip(b'\x00') ohne Kopie
+    end = n
+    while end > BODY_OFFSET and byte_msg[end - 1] == 0:
+        end -= 1
+
+    if byte_msg[0] != 0x40:
+        return DecodeError("Kein gueltiges Mesh-Format")
+
+    if payload_type == 0x41:  # @A ACK Frame
+        return AckFrame(payload_type, msg_id, max_hop_raw & 0x0F, max_hop_raw >> 4, calced_fcs,
+                        mv[BODY_OFFSET:end].hex().upper(), ACK_ID.unpack_from(byte_msg, n - 5)[0])
+
+    if payload_type != 0x3A and payload_type != 0x21:
+        return DecodeError("Kein gueltiges Mesh-Format")
+
+    # Path bis einschliesslich '>'
+    split_idx = byte_msg.find(b'>', BODY_OFFSET, end)
+    if split_idx == -1:
+        return DecodeError("Kein gültiges Routing-Format")
+
+    path = str(mv[BODY_OFFSET:split_idx + 1], "utf-8", "ignore")
+    dest_start = split_idx + 1
+
+    if payload_type == 0x3A:  # @: Text
+        split_idx = byte_msg.find(b':', dest_start, end)
+        if split_idx == -1:
+            return DecodeError("Destination not found")
+    else:                     # @! Position, '*' gehoert noch zum Ziel
+        split_idx = byte_msg.find(b'*', dest_start, end) + 1
+        if split_idx == 0:
+            split_idx = dest_start
+
+    dest = str(mv[dest_start:split_idx], "utf-8", "ignore")
+
+    msg_end = byte_msg.find(b'\x00', dest_start, end)
+    if msg_end == -1:
+        msg_end = end - 1
+    message = str(mv[split_idx:msg_end], "utf-8", "ignore").strip()
+
+    zero, hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms = \
+        TRAILER.unpack_from(byte_msg, n - TRAILER_SIZE)
+
+    return TextFrame(payload_type, msg_id, max_hop_raw & 0x0F, max_hop_raw >> 4, message, path, dest,
+                     hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms, calced_fcs == fcs,
+                     classify_dest(message, path, dest))
+
+def classify_dest(message, path, dest):
+    """dest_type eines Text- oder Positionsframes, eigene Funktion, damit meshcom_profiler sie messen kann."""
+    if message.startswith(":{CET}"):
+        return "Datum & Zeit Broadcast an alle"
+    elif path.startswith("response"):
+        return "user input response"
+    elif message.startswith("!"):
+        return "Positionsmeldung"
+    elif dest == "*":
+        return "Broadcast an alle"
+    elif dest.isdigit():
+        return f"Gruppennachricht an {dest}"
+    else:
+        return f"Direktnachricht an {dest}"
+
+def decode_frame(clean_msg):
+    """Dekodiert einen Frame je nach Typ zu einem Record, None wenn es gar kein Frame ist (z.B. Konsolentext)."""
+    # JSON-Nachrichten beginnen mit 'D{'
+    if clean_msg.startswith(b'D{'):
+        return decode_json_frame(clean_msg)
+
+    # Binärnachrichten beginnen mit '@'
+    elif clean_msg.startswith(b'@'):
+        return decode_binary_frame(clean_msg)
+
+    # UDP und serielle Konsole liefern JSON ohne das 'D'
+    elif clean_msg.startswith(b'{'):
+        return decode_udp_frame(clean_msg)
+
+    return None
+
+def pack_frames(frames):
+    """Packt Frames hintereinander in einen Puffer, offsets[i]:offsets[i+1] ist Frame i."""
+    offsets = [0]
+    for frame in frames:
+        offsets.append(offsets[-1] + len(frame))
+    return b''.join(frames), offsets
+
+def check_fcs_batch(buffer, offsets, use_numpy=True):
+    """Prueft die FCS vieler Frames auf einmal, Ergebnis wie calc_fcs(frame[1:-11]) == fcs.
+
+    buffer  - alle Frames hintereinander (bytes, bytearray, mmap ...)
+    offsets - Startpositionen plus Ende des letzten Frames, siehe pack_frames()
+    Frames kuerzer als der Trailer koennen keine FCS haben und gelten als fehlerhaft.
+    """
+    if use_numpy and load_numpy() is not None:
+        return _check_fcs_numpy(buffer, offsets)
+
+    result = []
+    for i in range(len(offsets) - 1):
+        start = offsets[i]
+        end = offsets[i + 1]
+        if end - start < TRAILER_SIZE:
+            result.append(False)
+            continue
+        #sum() ueber eine bytes Kopie ist schneller als ueber eine memoryview
+        fcs = sum(buffer[start + HEADER_OFFSET:end - FCS_TAIL])
+        calced = ((fcs & 0xFF00) >> 8) | ((fcs & 0xFF) << 8)
+        result.append(calced == buffer[end - FCS_TAIL] | (buffer[end - FCS_TAIL + 1] << 8))
+    return result
+
+def _check_fcs_numpy(buffer, offsets):
+    #Praefixsummen ueber den ganzen Puffer, dann ist jede Frame-Summe eine Subtraktion
+    np = load_numpy()
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if len(data) < TRAILER_SIZE:
+        return [False] * (len(offsets) - 1)
+    prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(data, dtype=np.uint64, out=prefix[1:])
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    start = offsets[:-1]
+    end = offsets[1:]
+    valid = (end - start) >= TRAILER_SIZE
+
+    #zu kurze Frames zeigen auf Position 0, start kann bei einem leeren letzten Frame hinter dem Puffer liegen
+    fcs_pos = np.where(valid, end - FCS_TAIL, 0)
+    lo = np.where(valid, start + HEADER_OFFSET, 0)
+    fcs = (prefix[fcs_pos] - prefix[lo]).astype(np.uint32)
+    calced = ((fcs & 0xFF00) >> 8) | ((fcs & 0xFF) << 8)
+
+    stored = data[fcs_pos].astype(np.uint32) | (data[np.minimum(fcs_pos + 1, len(data) - 1)].astype(np.uint32) << 8)
+    return ((calced == stored) & valid).tolist()
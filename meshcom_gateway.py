@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_gateway.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Empfaengt von einem oder mehreren Transporten (BLE, UDP, Seriell) und schickt alles
+    durch dieselbe Pipeline: Duplikatfilter, Decoder, Ausgabe und optional Mitschnitt und SQLite.
+    Welche Transporte laufen, steht in der Konfigurationsdatei, siehe meshcom.jsonc.sample.
+    Mehrere BLE Nodes laufen im selben Event Loop, doppelt gehoerte Frames werden zu einem zusammengefuehrt.
+    Mit "metrics_port" gibt es Metriken im Prometheus Format, siehe meshcom_metrics.py.
+    Ausgegeben wird ueber "sinks" (stdout, jsonl, udp, broker), siehe meshcom_sinks.py.
+    Mit "profile" wird jede Stufe des Empfangs gemessen, Ausgabe per Signal, siehe meshcom_profiler.py.
+
+    $ python3 meshcom_gateway.py meshcom.jsonc
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import re
+import signal
+import sys
+from meshcom_dedup import DedupCache
+from meshcom_events import TypDispatcher, session_events
+from meshcom_records import JsonEvent
+from meshcom_heard import HeardTable
+from meshcom_pipeline import FramePipeline
+from meshcom_sinks import SinkSet, make_sink
+from meshcom_transport import make_transport
+
+CONFIG_FILE = "meshcom.jsonc"
+MERGE_DELAY = 0.5 # Sekunden
+#ein JSON String (wird behalten) oder ein // Kommentar bis zum Zeilenende (wird entfernt)
+JSONC_TOKEN = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*')
+
+def load_config(filename):
+    """jsonc einlesen, Kommentare mit // werden entfernt, // in Strings (z.B. URLs) bleibt stehen."""
+    with open(filename, "r", encoding="utf-8") as file:
+        text = file.read()
+    return json.loads(JSONC_TOKEN.sub(lambda m: m.group(1) or "", text))
+
+#Ausgaben aus "sinks" in der Konfiguration, ohne Eintrag wie bisher auf stdout
+output = SinkSet()
+
+#von den JSON Frames des Nodes werden nur die MH Updates ausgegeben
+json_handlers = TypDispatcher()
+json_handlers.register("MH")(lambda sender, event: output.emit(event, sender))
+
+def print_frame(sender, raw, decoded):
+    """Ausgabe wie MeshCom-Read.py."""
+    if raw.startswith(b'D{'):
+        if isinstance(decoded, JsonEvent):
+            json_handlers.dispatch(sender, decoded)
+        else:
+            output.emit(decoded, sender)
+    elif decoded is None:
+        output.emit(f"Unbekannter Nachrichtentyp von {sender}: {raw[:80]}", sender)
+    else:
+        output.emit(decoded, sender)
+
+async def run(config):
+    for entry in config.get("sinks") or [{"type": "stdout"}]:
+        output.add(make_sink(entry))
+    await output.start()
+
+    recorder = None
+    if config.get("capture_file"):
+        from meshcom_capture import CaptureWriter
+        recorder = CaptureWriter(config["capture_file"])
+
+    store = None
+    if config.get("db_file"):
+        from meshcom_store import MessageStore
+        store = MessageStore(config["db_file"])
+
+    heard = HeardTable()
+    heard_file = config.get("heard_file")
+    if heard_file:
+        print(f"MHeard: {heard.load(heard_file)} Stationen aus {heard_file}")
+
+    profiler = None
+    if config.get("profile"):
+        from meshcom_profiler import StageProfiler, choose_sampler
+        sampler = choose_sampler(config["profile"])
+        if sampler is not None:
+            profiler = StageProfiler(sampler=sampler)
+    if profiler is not None:
+        profiler.install()
+        profiler.install_signals(asyncio.get_running_loop())
+
+    show, heard_update = print_frame, heard.update
+    store_add = store.add if store is not None else None
+    if profiler is not None:
+        #Konsole, MHeard und SQLite einzeln, zusammen sind sie die Stufe "output"
+        show = profiler.wrap("console", show)
+        heard_update = profiler.wrap("heard", heard_update)
+        if store_add is not None:
+            store_add = profiler.wrap("store", store_add)
+
+    #Konfig-Burst und CONFFIN der BLE Nodes aus den dekodierten JSON Frames
+    sessions = {}
+    to_session = session_events(sessions)
+
+    def dispatch(sender, raw, decoded):
+        to_session(sender, decoded)
+        show(sender, raw, decoded)
+        heard_update(decoded)
+        if store_add is not None:
+            store_add(decoded, pipeline.rx_time)
+
+    #bei mehreren BLE Nodes auf die Kopien der anderen warten, dann steht in rx_nodes wer den Frame gehoert hat
+    ble_count = sum(1 for entry in config["transports"] if entry.get("type") == "ble")
+    merge_delay = config.get("merge_delay")
+    if merge_delay is None and ble_count > 1:
+        merge_delay = MERGE_DELAY
+    pipeline = FramePipeline(dispatch, recorder=recorder, dedup=DedupCache(), merge_delay=merge_delay,
+                             profiler=profiler)
+    pipeline.start()
+
+    transports = [make_transport(entry, pipeline.feed) for entry in config["transports"]]
+    sessions.update((t.address, t.session) for t in transports if t.name == "ble")
+
+    metrics_server = None
+    if config.get("metrics_port") is not None:
+        from meshcom_metrics import (MetricsRegistry, MetricsServer, register_pipeline, register_links,
+                                     register_sinks)
+
+        registry = MetricsRegistry()
+        register_pipeline(registry, pipeline)
+        links = {}
+        for t in transports:
+            if t.name == "ble":
+                links[t.address] = t.session
+            elif t.name == "serial":
+                links[t.port] = t.reader
+        register_links(registry, links)
+        register_sinks(registry, output)
+        metrics_server = MetricsServer(registry, config.get("metrics_host", "127.0.0.1"), config["metrics_port"])
+        await metrics_server.start()
+
+    tasks = [asyncio.create_task(t.run()) for t in transports]
+    for t in transports:
+        print(f"Transport {t.name} gestartet")
+    helpers = [asyncio.create_task(heard.run(heard_file))] if heard_file else []
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    #ein abgestuerzter Transport beendet das Gateway, damit systemd neu starten kann
+    stop_task = asyncio.create_task(stop_event.wait())
+    done, _ = await asyncio.wait(tasks + [stop_task], return_when=asyncio.FIRST_COMPLETED)
+    for task in done:
+        if task is not stop_task and task.exception():
+            print(f"Transport beendet mit Fehler: {task.exception()}")
+
+    for t in transports:
+        await t.close()
+    for task in tasks + helpers + [stop_task]:
+        task.cancel()
+    await asyncio.gather(*tasks, *helpers, stop_task, return_exceptions=True)
+
+    if metrics_server is not None:
+        await metrics_server.close()
+    await pipeline.stop(drain=False)
+    await output.close()
+    if store is not None:
+        store.close()
+    print(pipeline.latency.summary())
+    if profiler is not None:
+        profiler.uninstall()
+        print(profiler.summary())
+    if len(pipeline.per_sender) > 1:
+        print(f"Frames pro Quelle: {pipeline.per_sender}")
+
+if __name__ == "__main__":
+    config_file = sys.argv[1] if len(sys.argv) > 1 else CONFIG_FILE
+    asyncio.run(run(load_config(config_file)))
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_heard.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: MHeard Tabelle, welche Stationen der Node gehoert hat, im Speicher nach Rufzeichen.
+    Pro Station: zuerst/zuletzt gehoert, Hops, Hardware, RSSI/SNR aus MH, Anzahl Nachrichten und Positionen,
+    letzte Position. Jeder Frame ist ein dict Zugriff und ein move_to_end, also O(1).
+    Die Tabelle ist nach last_seen sortiert, heard_since() laeuft von hinten und hoert beim ersten
+    zu alten Eintrag auf, kostet also nur so viel wie es Treffer gibt.
+    Snapshots gehen alle interval Sekunden kompakt als JSON auf die Platte (erst .tmp, dann os.replace),
+    nach einem Neustart liest load() sie wieder ein.
+
+    $ python3 meshcom_heard.py mheard.json --minutes 60
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from meshcom_records import TextFrame, JsonEvent
+from meshcom_frames import sender_of
+
+HEARD_FILE = "mheard.json"
+SNAPSHOT_INTERVAL = 60.0  # Sekunden
+
+#APRS Position im @! Frame: !4812.34N/01123.45E...
+POSITION = re.compile(r"!(\d{2})(\d{2}\.\d+)([NS]).(\d{3})(\d{2}\.\d+)([EW])")
+
+def parse_position(message):
+    """(lat, lon) in Grad aus einer APRS Positionsmeldung, None wenn keine drin ist."""
+    m = POSITION.search(message)
+    if m is None:
+        return None
+    lat = int(m.group(1)) + float(m.group(2)) / 60
+    lon = int(m.group(4)) + float(m.group(5)) / 60
+    if m.group(3) == "S":
+        lat = -lat
+    if m.group(6) == "W":
+        lon = -lon
+    return (round(lat, 5), round(lon, 5))
+
+class Station:
+    __slots__ = ("callsign", "first_seen", "last_seen", "hops", "hardware", "rssi", "snr",
+                 "messages", "positions", "mh_updates", "position")
+
+    def __init__(self, callsign, now):
+        self.callsign = callsign
+        self.first_seen = now
+        self.last_seen = now
+        self.hops = None
+        self.hardware = None
+        self.rssi = None
+        self.snr = None
+        self.messages = 0
+        self.positions = 0
+        self.mh_updates = 0
+        self.position = None
+
+    def as_list(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_list(cls, values):
+        station = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            setattr(station, name, value)
+        if station.position is not None:
+            station.position = tuple(station.position)
+        return station
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class HeardTable:
+    def __init__(self):
+        self.stations = OrderedDict()  # Rufzeichen -> Station, zuletzt gehoert hinten
+
+    def __len__(self):
+        return len(self.stations)
+
+    def _touch(self, callsign, now):
+        station = self.stations.get(callsign)
+        if station is None:
+            station = self.stations[callsign] = Station(callsign, now)
+        else:
+            station.last_seen = now
+            self.stations.move_to_end(callsign)
+        return station
+
+    def update(self, record, now=None):
+        """Mit jedem dekodierten Frame aufrufen, zaehlt Text- und Positionsframes und MH Updates."""
+        if now is None:
+            now = time.time()
+
+        if isinstance(record, TextFrame):
+            callsign = sender_of(record.path)
+            if callsign is None:
+                return None
+            station = self._touch(callsign, now)
+            station.hops = record.path.count(",")
+            station.hardware = record.hardware_id
+            if record.payload_type == 0x21:
+                station.positions += 1
+                position = parse_position(record.message)
+                if position is not None:
+                    station.position = position
+            else:
+                station.messages += 1
+            return station
+
+        if isinstance(record, JsonEvent) and record.typ == "MH":
+            callsign = record.get("CALL")
+            if not callsign:
+                return None
+            station = self._touch(callsign, now)
+            station.mh_updates += 1
+            station.hardware = record.get("HW", station.hardware)
+            station.rssi = record.get("RSSI", station.rssi)
+            station.snr = record.get("SNR", station.snr)
+            return station
+
+        #UDP (--extudp): {"type":"msg"|"pos","src":"DK5EN-99,OE1XAR-12",...}
+        if isinstance(record, JsonEvent) and record.typ in ("msg", "pos"):
+            src = record.get("src")
+            callsign = sender_of(src) if isinstance(src, str) else None
+            if callsign is None:
+                return None
+            station = self._touch(callsign, now)
+            station.hops = src.count(",")
+            if record.typ == "pos":
+                station.positions += 1
+                lat, lon = record.get("lat"), record.get("long")
+                if lat is not None and lon is not None:
+                    station.position = (lat, lon)
+            else:
+                station.messages += 1
+            return station
+
+        return None
+
+    def get(self, callsign):
+        return self.stations.get(callsign)
+
+    def heard_since(self, seconds, now=None):
+        """Stationen der letzten seconds, zuletzt gehoerte zuerst."""
+        if now is None:
+            now = time.time()
+        limit = now - seconds
+        result = []
+        for station in reversed(self.stations.values()):
+            if station.last_seen < limit:
+                break
+            result.append(station)
+        return result
+
+    def snapshot(self):
+        return {"fields": Station.__slots__, "stations": [s.as_list() for s in self.stations.values()]}
+
+    def save(self, path, data=None):
+        """Kompakter Snapshot, erst in eine .tmp Datei, dann atomar umbenannt."""
+        if data is None:
+            data = self.snapshot()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"), ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Snapshot einlesen, eine fehlende Datei ist kein Fehler."""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return 0
+        if list(data.get("fields", [])) != list(Station.__slots__):
+            print(f"{path}: anderes Format, wird ignoriert")
+            return 0
+        stations = sorted((Station.from_list(values) for values in data["stations"]), key=lambda s: s.last_seen)
+        self.stations = OrderedDict((s.callsign, s) for s in stations)
+        return len(self.stations)
+
+    async def run(self, path, interval=SNAPSHOT_INTERVAL):
+        """Schreibt alle interval Sekunden einen Snapshot, bis der Task abgebrochen wird."""
+        pending = None
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                #Kopie im Loop ziehen, geschrieben wird im Thread, die Tabelle aendert sich ja weiter
+                pending = asyncio.ensure_future(asyncio.to_thread(self.save, path, self.snapshot()))
+                await asyncio.shield(pending)
+        finally:
+            #beim Abbruch laeuft der Thread weiter, erst fertig schreiben lassen, sonst teilen sich beide die .tmp Datei
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            self.save(path)
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="MHeard Snapshot abfragen")
+    parser.add_argument("path", nargs="?", default=HEARD_FILE)
+    parser.add_argument("--minutes", type=float, default=60)
+    args = parser.parse_args()
+
+    table = HeardTable()
+    table.load(args.path)
+    for s in table.heard_since(args.minutes * 60):
+        position = f"{s.position[0]:.4f},{s.position[1]:.4f}" if s.position else "-"
+        print(f"{datetime.fromtimestamp(s.last_seen):%H:%M:%S} {s.callsign:12} hops={s.hops} hw={s.hardware} "
+              f"rssi={s.rssi} snr={s.snr} msg={s.messages} pos={s.positions} {position}")
+    print(f"{len(table)} Stationen insgesamt")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_ingest.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: UDP Empfang fuer viele Nodes mit --extudp auf einem Listener.
+    asyncio liest pro Durchlauf des Event Loops nur ein Datagramm, bei vielen Nodes laeuft der Empfangspuffer
+    im Kernel dann voll und Pakete gehen still verloren. Hier haengt ein eigener Reader am Socket (loop.add_reader),
+    der bei jedem Aufruf bis zu batch_size Datagramme mit recvfrom abholt, zaehlt und als Liste weiterreicht.
+    recvfrom bekommt die volle UDP Laenge, ein kleinerer Wert schneidet laengere Datagramme still ab. Gemessen ist
+    recvfrom(65535) nicht langsamer als recvfrom(MAX_DATAGRAM), recvfrom_into mit eigenem Puffer plus Kopie dagegen schon.
+    Das JSON parst der Worker Task in einem Thread (to_thread), der Event Loop holt derweil weiter Datagramme ab.
+    Der handler laeuft wieder im Event Loop, die Batches kommen in Empfangsreihenfolge an.
+    Pro Absenderadresse werden Pakete und Bytes gezaehlt. Mit uvloop (falls installiert) geht es noch etwas schneller.
+
+    $ python3 meshcom_ingest.py bench --senders 8 --count 200000
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import socket
+import time
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+BATCH_SIZE = 256
+RCVBUF = 4 * 1024 * 1024  # Puffer fuer Bursts, der Kernel begrenzt auf net.core.rmem_max
+MAX_DATAGRAM = 65535      # groesstes UDP Datagramm, CPython gibt den Rest des Puffers gleich wieder frei
+
+def parse_batch(batch):
+    """[(addr, data), ...] -> [(addr, data, decoded), ...], kaputtes JSON ergibt None."""
+    result = []
+    for addr, data in batch:
+        try:
+            decoded = json.loads(data)
+        except ValueError:
+            decoded = None
+        result.append((addr, data, decoded))
+    return result
+
+class UdpIngest:
+    """handler(batch) bekommt Listen von (addr, data, decoded), ein Aufruf pro empfangenem Batch."""
+
+    def __init__(self, handler, host="0.0.0.0", port=1799, batch_size=BATCH_SIZE, rcvbuf=RCVBUF, maxsize=1000):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.rcvbuf = rcvbuf
+        self.queue = asyncio.Queue(maxsize)
+        self.per_source = {}  # addr -> [Pakete, Bytes]
+        self.packets = 0
+        self.batches = 0
+        self.dropped = 0
+        self.sock = None
+        self._worker = None
+
+    def open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        sock.bind((self.host, self.port))
+        sock.setblocking(False)
+        self.sock = sock
+        self.port = sock.getsockname()[1]
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._read_ready)
+        self._worker = asyncio.create_task(self._parse_worker())
+
+    def _read_ready(self):
+        recvfrom = self.sock.recvfrom
+        per_source = self.per_source
+        batch = []
+        for _ in range(self.batch_size):
+            try:
+                data, addr = recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                break
+            batch.append((addr, data))
+            counters = per_source.get(addr)
+            if counters is None:
+                counters = per_source[addr] = [0, 0]
+            counters[0] += 1
+            counters[1] += len(data)
+        if not batch:
+            return
+        self.packets += len(batch)
+        self.batches += 1
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            #Worker kommt nicht hinterher, lieber hier zaehlen als im Kernel still verlieren
+            self.dropped += len(batch)
+
+    async def _parse_worker(self):
+        while True:
+            batch = await self.queue.get()
+            try:
+                #json.loads haelt zwar den GIL, gibt ihn aber regelmaessig ab, recvfrom kommt so dazwischen
+                self.handler(await asyncio.to_thread(parse_batch, batch))
+            except Exception as e:
+                print(f"Fehler in der Ausgabe: {e}")
+            self.queue.task_done()
+
+    async def close(self, drain=True):
+        if self.sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self.sock.fileno())
+        if drain:
+            await self.queue.join()
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self.sock.close()
+        self.sock = None
+
+    def stats(self):
+        return {
+            "packets": self.packets,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "per_source": {f"{addr[0]}:{addr[1]}": {"packets": p, "bytes": b} for addr, (p, b) in self.per_source.items()},
+        }
+
+def install_uvloop():
+    """uvloop als Event Loop setzen, falls installiert, True wenn es geklappt hat."""
+    if uvloop is None:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+def load_generator(host, port, senders, count, rate=0):
+    """Simuliert senders Nodes mit je eigenem Socket, insgesamt count Datagramme, rate 0 = so schnell wie moeglich."""
+    socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(senders)]
+    payloads = [json.dumps({"src_type": "node", "type": "msg", "src": f"DK5EN-{i}", "dst": "TEST",
+                            "msg": "Lastgenerator " + "x" * 60, "msg_id": f"{i:08X}"}).encode()
+                for i in range(senders)]
+    interval = 1.0 / rate if rate else 0
+    start = time.perf_counter()
+    for n in range(count):
+        i = n % senders
+        socks[i].sendto(payloads[i], (host, port))
+        if interval:
+            delay = start + n * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    for sock in socks:
+        sock.close()
+
+async def bench_ingest(senders, count, rate, batch_size):
+    from multiprocessing import Process
+
+    received = 0
+
+    def handler(batch):
+        nonlocal received
+        received += len(batch)
+
+    ingest = UdpIngest(handler, "127.0.0.1", 0, batch_size=batch_size)
+    ingest.open()
+
+    #Lastgenerator im eigenen Prozess, sonst teilen sich Sender und Empfaenger den GIL
+    gen = Process(target=load_generator, args=("127.0.0.1", ingest.port, senders, count, rate))
+    start = time.perf_counter()
+    gen.start()
+    await asyncio.to_thread(gen.join)
+
+    #Rest abholen, bis eine Weile nichts mehr kommt
+    last = -1
+    while last != received:
+        last = received
+        await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - start - 0.2
+    await ingest.close()
+
+    stats = ingest.stats()
+    print(f"Gesendet: {count}, empfangen: {received}, verloren: {count - received}, im Worker verworfen: {stats['dropped']}")
+    print(f"{received / elapsed:,.0f} Datagramme/s, {stats['batches']} Batches, {len(stats['per_source'])} Quellen")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="UDP Empfang mit Lastgenerator messen")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--senders", type=int, default=8, help="Anzahl simulierter Nodes")
+    parser.add_argument("--count", type=int, default=100000, help="Datagramme insgesamt")
+    parser.add_argument("--rate", type=float, default=0, help="Datagramme/s, 0 = so schnell wie moeglich")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="1 entspricht dem Verhalten von asyncio")
+    parser.add_argument("--no-uvloop", action="store_true")
+    args = parser.parse_args()
+
+    if not args.no_uvloop and install_uvloop():
+        print("uvloop aktiv")
+    asyncio.run(bench_ingest(args.senders, args.count, args.rate, args.batch_size))
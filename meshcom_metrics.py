@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_metrics.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Metriken im Prometheus Textformat ueber einen kleinen lokalen HTTP Server (GET /metrics).
+    Damit sieht man einem unbeaufsichtigten Gateway an, wo der Durchsatz haengt, ohne die Ausgabe zu lesen.
+
+    Im Empfangspfad wird nur gezaehlt, was sonst nirgends steht: Frames pro Typ (@: @! @A D{),
+    Dauer des Dekodierens als Histogramm und FCS Fehler. Die Zaehler sind vorab gebunden
+    (PipelineMetrics haelt fuer jeden Typ ein Counter Objekt), pro Frame gibt es also keine Label Suche,
+    nur ein dict Zugriff auf die ersten zwei Bytes und ein += 1.
+    Alles, was ohnehin schon gezaehlt wird (Queue Tiefe, verworfene Frames, Duplikate, BLE Reconnects,
+    Frames pro Quelle, gesendet/bestaetigt), wird erst beim Abruf ueber eine Funktion gelesen.
+
+    Aktivieren: im Gateway "metrics_port" in der Konfiguration, im meshcom_daemon MESHCOM_METRICS_PORT.
+    $ curl -s localhost:9464/metrics
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+from bisect import bisect_left
+from meshcom_frames import FRAME_TYPES
+
+METRICS_HOST = "127.0.0.1"  # nur lokal, nach aussen z.B. ueber einen Reverse Proxy
+METRICS_PORT = 9464
+DECODE_BUCKETS = (10e-6, 25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 5e-3, 25e-3)  # Sekunden
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # letzter Eintrag: darueber
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(int(value))
+
+class Family:
+    """Eine Metrik mit ihren Label-Kombinationen, labels() nur beim Aufsetzen verwenden, nicht pro Frame."""
+
+    def __init__(self, name, help, kind, labelnames=(), buckets=None, func=None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self.func = func          # statt children: liefert beim Abruf Wert oder {Labelwerte: Wert}
+        self.children = {}
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = Histogram(self.buckets) if self.kind == "histogram" else Counter()
+            self.children[values] = child
+        return child
+
+    def samples(self):
+        if self.func is None:
+            return [(values, child.value) for values, child in self.children.items()]
+        result = self.func()
+        if isinstance(result, dict):
+            return [(values if isinstance(values, tuple) else (values,), value) for values, value in result.items()]
+        return [((), result)]
+
+    def render(self, out):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        if self.kind != "histogram":
+            for values, value in self.samples():
+                out.append(f"{self.name}{_labels(self.labelnames, values)} {_number(value)}")
+            return
+        for values, hist in self.children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), hist.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, values)} {hist.sum!r}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, values)} {hist.count}")
+
+class MetricsRegistry:
+    def __init__(self):
+        self.families = {}
+
+    def _add(self, family):
+        if family.name in self.families:
+            raise ValueError(f"Metrik {family.name} gibt es schon")
+        self.families[family.name] = family
+        return family
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Family(name, help, "counter", labelnames))
+
+    def histogram(self, name, help, buckets, labelnames=()):
+        return self._add(Family(name, help, "histogram", labelnames, buckets=tuple(buckets)))
+
+    def counter_func(self, name, help, func, labelnames=()):
+        """Zaehler, der schon woanders gefuehrt wird, func wird erst beim Abruf aufgerufen."""
+        return self._add(Family(name, help, "counter", labelnames, func=func))
+
+    def gauge_func(self, name, help, func, labelnames=()):
+        return self._add(Family(name, help, "gauge", labelnames, func=func))
+
+    def render(self):
+        out = []
+        for family in self.families.values():
+            try:
+                family.render(out)
+            except Exception as e:
+                #eine kaputte Quelle darf den Rest nicht mitnehmen
+                out.append(f"# {family.name}: {e}")
+        return "\n".join(out) + "\n"
+
+class PipelineMetrics:
+    """Vorab gebundene Zaehler fuer FramePipeline, dort als metrics= uebergeben."""
+
+    def __init__(self, registry):
+        frames = registry.counter("meshcom_frames_total", "Empfangene Frames nach Typ", ("type",))
+        self.frames = {prefix: frames.labels(name) for prefix, name in FRAME_TYPES.items()}
+        self.frames_other = frames.labels("other")
+        self.decode_seconds = registry.histogram("meshcom_decode_seconds", "Dauer des Dekodierens pro Frame",
+                                                 DECODE_BUCKETS).labels()
+        self.fcs_failed = registry.counter("meshcom_fcs_failed_total", "Textframes mit falscher FCS").labels()
+
+def register_pipeline(registry, pipeline):
+    """Zaehler im Empfangspfad einhaengen und die vorhandenen Zaehler der Pipeline beim Abruf lesen."""
+    pipeline.metrics = PipelineMetrics(registry)
+    registry.counter_func("meshcom_received_total", "Frames von allen Transporten, vor dem Duplikatfilter",
+                          lambda: pipeline.received)
+    registry.counter_func("meshcom_dropped_total", "Verworfen, weil die Eingangsqueue voll war",
+                          lambda: pipeline.dropped)
+    registry.counter_func("meshcom_frames_per_sender_total", "Frames pro Quelle (BLE Node, UDP Adresse, Port)",
+                          lambda: {str(sender) if not isinstance(sender, tuple) else f"{sender[0]}:{sender[1]}": count
+                                   for sender, count in pipeline.per_sender.items()}, ("sender",))
+    registry.gauge_func("meshcom_queue_depth", "Frames in den Queues der Pipeline",
+                        lambda: {"raw": pipeline.raw_queue.qsize(), "decoded": pipeline.decoded_queue.qsize()},
+                        ("queue",))
+    if pipeline.dedup is not None:
+        dedup = pipeline.dedup
+        registry.counter_func("meshcom_duplicates_total", "Vom Duplikatfilter verworfene Frames", lambda: dedup.hits)
+        registry.gauge_func("meshcom_dedup_entries", "Schluessel im Duplikatfilter", lambda: len(dedup))
+
+def register_links(registry, links):
+    """links: {Name: Objekt mit reconnects und connected}, z.B. BleSession oder SerialReader."""
+    registry.counter_func("meshcom_reconnects_total", "Neu aufgebaute Verbindungen zum Node",
+                          lambda: {name: link.reconnects for name, link in links.items()}, ("link",))
+    registry.gauge_func("meshcom_link_up", "1 wenn die Verbindung steht",
+                        lambda: {name: int(link.connected.is_set()) for name, link in links.items()}, ("link",))
+
+def register_ingest(registry, ingest):
+    """UdpIngest (meshcom_ingest.py), Datagramme pro Absender."""
+    registry.counter_func("meshcom_udp_datagrams_total", "UDP Datagramme pro Absender",
+                          lambda: {f"{addr[0]}:{addr[1]}": counts[0] for addr, counts in ingest.per_source.items()},
+                          ("source",))
+    registry.counter_func("meshcom_udp_dropped_total", "UDP Batches verworfen, Parse Queue voll",
+                          lambda: ingest.dropped)
+
+def register_sending(registry, schedulers, acks=None):
+    """schedulers: {Node: OutboundScheduler}, acks: AckTracker (meshcom_acks.py)."""
+    def scheduler_stat(name):
+        return lambda: {node: getattr(s.stats, name) for node, s in schedulers.items()}
+
+    registry.counter_func("meshcom_sent_total", "Gesendete Nachrichten", scheduler_stat("sent"), ("node",))
+    registry.counter_func("meshcom_send_failed_total", "Fehlgeschlagene Sendungen", scheduler_stat("failed"), ("node",))
+    registry.gauge_func("meshcom_send_queue_depth", "Wartende Nachrichten",
+                        lambda: {node: s.snapshot()["depth"] for node, s in schedulers.items()}, ("node",))
+    if acks is None:
+        return
+    for name, help in (("acked", "Bestaetigte Nachrichten"), ("lost", "Ohne ACK verfallene Nachrichten")):
+        registry.counter_func(f"meshcom_{name}_total", help,
+                              lambda name=name: {dst: getattr(s, name) for dst, s in acks.per_dest.items()}, ("dst",))
+    registry.counter_func("meshcom_unmatched_acks_total", "ACKs ohne passende Nachricht", lambda: acks.unmatched_acks)
+
+def register_sinks(registry, output):
+    """SinkSet (meshcom_sinks.py), Queue und Verluste pro Ausgabe."""
+    def sink_stat(name):
+        return lambda: {sink.name: getattr(sink, name) for sink in output.sinks}
+
+    registry.gauge_func("meshcom_sink_queue_depth", "Wartende Frames pro Ausgabe",
+                        lambda: {sink.name: len(sink.queue) for sink in output.sinks}, ("sink",))
+    registry.counter_func("meshcom_sink_written_total", "Geschriebene Frames pro Ausgabe", sink_stat("written"),
+                          ("sink",))
+    registry.counter_func("meshcom_sink_dropped_total", "Verworfene Frames, Queue der Ausgabe voll",
+                          sink_stat("dropped"), ("sink",))
+
+class MetricsServer:
+    """Minimaler HTTP/1.0 Server, beantwortet GET /metrics, alles andere mit 404."""
+
+    def __init__(self, registry, host=METRICS_HOST, port=METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] in (b"/metrics", b"/"):
+                status, body = "200 OK", self.registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"nur /metrics\n"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"Metriken auf http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
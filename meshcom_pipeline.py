@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_pipeline.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Ereignisgesteuerte Empfangskette fuer Frames vom MeshCom Node.
+    BLE notification -> Queue -> decode Task -> Queue -> dispatch Task (Ausgabe)
+
+    Der BLE Callback legt den Frame nur mit Zeitstempel in eine begrenzte Queue, kein Polling, kein sleep.
+    Zwischen decode und dispatch wird mit await put() gebremst (Backpressure). Der BLE Callback selbst
+    kann nicht warten, ist die Eingangsqueue voll, wird der aelteste Frame verworfen und gezaehlt.
+    Gemessen wird die Latenz vom Eintreffen der notification bis nach der Ausgabe.
+
+    Mehrere Nodes: alle Sessions fuettern dieselbe Pipeline, sender ist die Adresse des Nodes.
+    Mit merge_delay wird jeder Frame so lange zurueckgehalten, bis die Kopien der anderen Nodes da sind,
+    die Ausgabe bekommt dann "rx_nodes" mit allen Nodes, die den Frame gehoert haben.
+    Die Queues sind FIFO und werden in Empfangsreihenfolge gefuellt, der Strom bleibt zeitlich sortiert.
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+from collections import deque
+from time import perf_counter_ns, time
+from meshcom_frames import decode_frame, FRAME_TYPES
+from meshcom_dedup import frame_key
+from meshcom_records import TextFrame, AckFrame, DecodeError
+
+class LatencyStats:
+    """Latenz notification -> Ausgabe, Mittelwert/Maximum gesamt, Perzentile ueber die letzten Frames."""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.recent = deque(maxlen=window)
+
+    def add(self, ns):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.recent.append(ns)
+
+    def percentile(self, p):
+        if not self.recent:
+            return 0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+    def summary(self):
+        if not self.count:
+            return "Latenz: noch keine Frames"
+        return (f"Latenz notification->Ausgabe: n={self.count} "
+                f"avg={self.total_ns / self.count / 1e6:.3f}ms "
+                f"p50={self.percentile(50) / 1e6:.3f}ms "
+                f"p99={self.percentile(99) / 1e6:.3f}ms "
+                f"max={self.max_ns / 1e6:.3f}ms")
+
+class FramePipeline:
+    """Begrenzte Queues zwischen BLE Callback, Decoder und Ausgabe.
+
+    dispatch(sender, raw, decoded) wird fuer jeden Frame in Empfangsreihenfolge aufgerufen,
+    waehrenddessen steht in rx_time die Empfangszeit (time.time()) aus dem Zeitstempel von feed().
+    recorder ist optional ein CaptureWriter (meshcom_capture.py), der jeden rohen Frame mitschreibt.
+    dedup ist optional ein DedupCache (meshcom_dedup.py), Duplikate kommen gar nicht erst in die Queue.
+    Ist der erste Frame kaputt (DecodeError, FCS falsch) oder wird er verworfen, wird sein Schluessel wieder
+    ausgetragen, die naechste Kopie kommt dann durch.
+    merge_delay in Sekunden schaltet das Zusammenfuehren mehrerer Nodes ein (braucht dedup).
+    metrics ist optional ein PipelineMetrics (meshcom_metrics.py), ohne kostet es nur die None Abfrage.
+    profiler ist optional ein StageProfiler (meshcom_profiler.py), misst wait, decode und output pro Frame-Typ.
+    """
+
+    def __init__(self, dispatch, maxsize=1000, decoder=decode_frame, recorder=None, dedup=None, merge_delay=None,
+                 metrics=None, profiler=None):
+        self.dispatch = dispatch
+        self.decoder = decoder
+        self.recorder = recorder
+        self.dedup = dedup
+        self.merge_delay = merge_delay
+        self.metrics = metrics
+        self.profiler = profiler
+        self.per_sender = {}
+        self._rx_nodes = {}  # Schluessel -> Nodes, solange der Frame noch zurueckgehalten wird
+        self.raw_queue = asyncio.Queue(maxsize)
+        self.decoded_queue = asyncio.Queue(maxsize)
+        self.latency = LatencyStats()
+        self.rx_time = None
+        self.received = 0
+        self.dropped = 0
+        self.tasks = []
+
+    def feed(self, sender, data):
+        """Als BLE notification handler verwenden, blockiert nie."""
+        self.received += 1
+        self.per_sender[sender] = self.per_sender.get(sender, 0) + 1
+        if self.recorder is not None:
+            self.recorder.write(data)
+        metrics = self.metrics
+        if metrics is not None:
+            #BLE liefert bytearray, das ist als Schluessel nicht hashbar
+            metrics.frames.get(bytes(data[:2]), metrics.frames_other).value += 1
+
+        key = None
+        if self.dedup is not None:
+            key = frame_key(data)
+            if key is not None and self.dedup.check(key):
+                nodes = self._rx_nodes.get(key)
+                if nodes is not None and sender not in nodes:
+                    nodes.append(sender)
+                return
+            if self.merge_delay is not None and key is not None:
+                self._rx_nodes[key] = [sender]
+
+        item = (perf_counter_ns(), sender, data, key)
+        try:
+            self.raw_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            #aeltesten Frame opfern, damit die aktuellen durchkommen
+            dropped = self.raw_queue.get_nowait()
+            self.raw_queue.task_done()
+            self._forget(dropped[3])
+            self.dropped += 1
+            self.raw_queue.put_nowait(item)
+
+    def _forget(self, key):
+        """Frame zaehlt nicht als gesehen, Wiederholungen werden wieder angenommen."""
+        if key is not None:
+            self.dedup.forget(key)
+            self._rx_nodes.pop(key, None)
+
+    async def _decode_worker(self):
+        while True:
+            t_rx, sender, data, key = await self.raw_queue.get()
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.frame_type = FRAME_TYPES.get(bytes(data[:2]), "other")
+            t_start = perf_counter_ns()
+            try:
+                decoded = self.decoder(data)
+            except Exception as e:
+                decoded = None
+                print(f"Fehler beim Dekodieren: {e}")
+            if profiler is not None:
+                profiler.add("wait", profiler.frame_type, t_start - t_rx)
+                profiler.add("decode", profiler.frame_type, perf_counter_ns() - t_start)
+            metrics = self.metrics
+            if metrics is not None:
+                metrics.decode_seconds.observe((perf_counter_ns() - t_start) / 1e9)
+                if decoded.__class__ is TextFrame and not decoded.fcs_ok:
+                    metrics.fcs_failed.value += 1
+            if key is not None and (decoded is None or decoded.__class__ is DecodeError
+                                    or (decoded.__class__ is TextFrame and not decoded.fcs_ok)):
+                self._forget(key)
+                key = None
+            await self.decoded_queue.put((t_rx, sender, data, key, decoded))
+            self.raw_queue.task_done()
+
+    async def _dispatch_worker(self):
+        while True:
+            t_rx, sender, data, key, decoded = await self.decoded_queue.get()
+            if self.merge_delay is not None:
+                #Verzoegerungsleitung, die Frames kommen in Empfangsreihenfolge, also reicht ein sleep
+                delay = self.merge_delay - (perf_counter_ns() - t_rx) / 1e9
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                #immer austragen, auch DecodeError und JSON Frames, sonst bleibt der Eintrag fuer immer liegen
+                nodes = self._rx_nodes.pop(key, None)
+                if isinstance(decoded, (TextFrame, AckFrame)):
+                    decoded.rx_nodes = nodes or [sender]
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.frame_type = FRAME_TYPES.get(bytes(data[:2]), "other")
+                t_start = perf_counter_ns()
+            #perf_counter Zeitstempel in Wandzeit umrechnen, erst hier, damit ein Stellen der Uhr (NTP) mitgeht
+            self.rx_time = time() - (perf_counter_ns() - t_rx) / 1e9
+            try:
+                self.dispatch(sender, data, decoded)
+            except Exception as e:
+                print(f"Fehler bei der Ausgabe: {e}")
+            if profiler is not None:
+                profiler.add("output", profiler.frame_type, perf_counter_ns() - t_start)
+            self.latency.add(perf_counter_ns() - t_rx)
+            self.decoded_queue.task_done()
+
+    def start(self):
+        self.tasks = [
+            asyncio.create_task(self._decode_worker()),
+            asyncio.create_task(self._dispatch_worker()),
+        ]
+        if self.recorder is not None:
+            self.tasks.append(asyncio.create_task(self.recorder.run()))
+
+    async def stop(self, drain=True):
+        if drain:
+            await self.raw_queue.join()
+            await self.decoded_queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_profile.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Profil eines Nodes aus dem Konfig-Burst nach dem HELLO.
+    Der Node schickt I (Firmware, Rufzeichen), SN (Einstellungen), SE (Sensoren), SW (WLAN), G, SA, W
+    und zum Schluss CONFFIN. Das Profil wird pro Node-Adresse auf der Platte gehalten:
+    nach dem Start steht das letzte Profil sofort zur Verfuegung, beim naechsten Burst werden nur die
+    geaenderten Felder uebernommen und gemeldet, gespeichert wird nur, wenn sich etwas geaendert hat.
+    BleSession.on_event (meshcom_ble.py) bekommt die Events aus der Pipeline, fuettert das Profil und meldet mit CONFFIN "ready".
+    Geschrieben wird bei CONFFIN in einem Thread (asyncio.to_thread), der Event Loop blockiert nicht auf der Platte,
+    flush() wartet auf den letzten Schreibvorgang.
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import os
+
+PROFILE_DIR = os.environ.get("MESHCOM_PROFILE_DIR", os.path.expanduser("~/.cache/meshcom"))
+PROFILE_TYPES = ("I", "SN", "SE", "SW", "G", "SA", "W")
+
+class NodeProfile:
+    def __init__(self, address, cache_dir=PROFILE_DIR):
+        self.address = address
+        self.path = os.path.join(cache_dir, address.replace(":", "").lower() + ".json")
+        self.sections = {}  # TYP -> dict mit den zuletzt gemeldeten Feldern
+        self.changed = {}   # TYP -> Felder, die sich im aktuellen Burst geaendert haben
+        self.saving = None  # laufender Schreib-Task, Referenz halten
+        self.cached = self.load()
+
+    def load(self):
+        """Profil aus dem Cache, True wenn es eins gab."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.sections = json.load(file)
+            return True
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def save(self, text=None):
+        """Schreibt synchron, erst in eine .tmp Datei, dann atomar umbenannt."""
+        if text is None:
+            text = json.dumps(self.sections, ensure_ascii=False, indent=1)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp, self.path)
+
+    def save_soon(self):
+        """Ohne laufenden Loop wie save(), sonst im Thread. Der Text wird hier auf dem Loop erzeugt,
+        spaetere Aenderungen an sections landen erst im naechsten Snapshot. Ein neuer Schreibvorgang
+        wartet auf den vorigen, beide nutzen dieselbe .tmp Datei."""
+        text = json.dumps(self.sections, ensure_ascii=False, indent=1)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save(text)
+            return
+        previous = self.saving
+
+        async def write():
+            if previous is not None:
+                await asyncio.wait([previous])
+            try:
+                await asyncio.to_thread(self.save, text)
+            except OSError as e:
+                print(f"Profil {self.path} nicht gespeichert: {e}")
+
+        self.saving = loop.create_task(write())
+
+    async def flush(self):
+        """Wartet auf den laufenden Schreibvorgang, z.B. vor dem Beenden."""
+        if self.saving is not None:
+            await asyncio.shield(self.saving)
+
+    def start_burst(self):
+        """Nach jedem HELLO aufrufen."""
+        self.changed = {}
+
+    def on_event(self, event):
+        """Nimmt ein JsonEvent aus dem Burst, True bei CONFFIN."""
+        typ = event.typ
+        if typ == "CONFFIN":
+            if self.changed:
+                self.save_soon()
+            return True
+        if typ in PROFILE_TYPES and isinstance(event.data, dict):
+            section = self.sections.setdefault(typ, {})
+            for key, value in event.data.items():
+                if section.get(key, self) != value:
+                    section[key] = value
+                    self.changed.setdefault(typ, {})[key] = value
+        return False
+
+    def get(self, typ, key, default=None):
+        return self.sections.get(typ, {}).get(key, default)
+
+    def summary(self):
+        fw = f"{self.get('I', 'FWVER', '?')}{self.get('I', 'FWSUB', '')}"
+        return f"{self.get('I', 'CALL', '?')} FW {fw} HW {self.get('I', 'HWID', '?')} QRG {self.get('SN', 'MQRG', '?')}"
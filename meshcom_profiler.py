@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_profiler.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Wo bleibt die Zeit, wenn ein Gateway nicht mehr nachkommt? Misst jede Stufe des Empfangs
+    mit perf_counter_ns, pro Stufe und Frame-Typ (text, position, ack, json), mit gleitenden Perzentilen:
+
+      wait      notification bis der Decoder den Frame aus der Queue holt
+      decode    decode_binary_frame / decode_json_frame (classify ist darin enthalten)
+      classify  dest_type Bestimmung (classify_dest in meshcom_frames.py)
+      output    dispatch, also Ausgabe auf der Konsole, MHeard, SQLite
+      Weitere Stufen mit wrap(), z.B. profiler.wrap("store", store.add).
+
+    Eingeschaltet wird mit FramePipeline(profiler=...) bzw. MESHCOM_PROFILE (MeshCom-Read.py) oder "profile"
+    in der Gateway Konfiguration, Werte siehe choose_sampler(). Aus kostet es nur die None Abfrage in der Pipeline.
+
+    Signale an den laufenden Prozess:
+      kill -USR1 <pid>   Tabelle der Stufen ausgeben und als JSON ablegen
+      kill -USR2 <pid>   Sampling starten, beim naechsten USR2 stoppen und schreiben:
+                         "stacks"   gesammelte Stacks im collapsed Format (flamegraph.pl, speedscope)
+                         "cprofile" cProfile Datei, ansehen mit python3 -m pstats oder snakeviz
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from time import perf_counter_ns
+import meshcom_frames
+from meshcom_pipeline import LatencyStats
+
+SAMPLE_INTERVAL = 0.005  # Sekunden zwischen zwei Stack Samples
+SAMPLERS = ("stacks", "cprofile")
+OFF = ("", "0", "false", "off", "no")
+
+def choose_sampler(setting):
+    """Wert von MESHCOM_PROFILE bzw. "profile" in der Konfiguration: None = aus, sonst der Sampler.
+    1, true, on usw. heissen "stacks", ein unbekannter Name wird gemeldet und ebenfalls "stacks"."""
+    if setting is None or setting is False or str(setting).strip().lower() in OFF:
+        return None
+    if setting in SAMPLERS:
+        return setting
+    if setting is not True and str(setting).strip().lower() not in ("1", "true", "on", "yes"):
+        print(f"Profiling: unbekannter Sampler {setting!r}, nehme stacks (moeglich sind {', '.join(SAMPLERS)})")
+    return "stacks"
+
+class StackSampler:
+    """Fragt aus einem eigenen Thread regelmaessig den Stack des Event Loop Threads ab."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="meshcom-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, path):
+        self._stop.set()
+        self._thread.join()
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        return path
+
+class CProfileSampler:
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self, path):
+        import pstats
+
+        self.profile.disable()
+        self.profile.dump_stats(path)
+        pstats.Stats(self.profile).sort_stats("cumulative").print_stats(15)
+        return path
+
+class StageProfiler:
+    """Zeiten pro (Stufe, Frame-Typ), die Pipeline setzt frame_type, bevor sie eine Stufe aufruft."""
+
+    def __init__(self, window=1000, sampler="stacks", out_dir="."):
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unbekannter Sampler: {sampler}, moeglich sind {', '.join(SAMPLERS)}")
+        self.window = window
+        self.sampler = sampler
+        self.out_dir = out_dir
+        self.frame_type = "other"
+        self.stats = {}  # (Stufe, Typ) -> LatencyStats
+        self._active = None
+        self._classify = None
+
+    def add(self, stage, frame_type, ns):
+        stats = self.stats.get((stage, frame_type))
+        if stats is None:
+            stats = self.stats[(stage, frame_type)] = LatencyStats(self.window)
+        stats.add(ns)
+
+    def wrap(self, stage, func):
+        """func mit Zeitmessung, der Frame-Typ kommt aus der Pipeline."""
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, self.frame_type, perf_counter_ns() - start)
+        timed.__wrapped__ = func
+        return timed
+
+    def install(self):
+        """classify_dest in meshcom_frames durch die gemessene Variante ersetzen, uninstall() stellt zurueck."""
+        if self._classify is None:
+            self._classify = meshcom_frames.classify_dest
+            meshcom_frames.classify_dest = self.wrap("classify", self._classify)
+
+    def uninstall(self):
+        if self._classify is not None:
+            meshcom_frames.classify_dest = self._classify
+            self._classify = None
+
+    def snapshot(self):
+        result = {}
+        for (stage, frame_type), s in sorted(self.stats.items()):
+            result.setdefault(stage, {})[frame_type] = {
+                "n": s.count,
+                "avg_us": round(s.total_ns / s.count / 1e3, 2),
+                "p50_us": round(s.percentile(50) / 1e3, 2),
+                "p90_us": round(s.percentile(90) / 1e3, 2),
+                "p99_us": round(s.percentile(99) / 1e3, 2),
+                "max_us": round(s.max_ns / 1e3, 2),
+                "total_ms": round(s.total_ns / 1e6, 2),
+            }
+        return result
+
+    def summary(self):
+        lines = [f"{'Stufe':9} {'Typ':9} {'n':>8} {'avg us':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'ges. ms':>9}"]
+        for stage, types in self.snapshot().items():
+            for frame_type, s in types.items():
+                lines.append(f"{stage:9} {frame_type:9} {s['n']:8} {s['avg_us']:9.1f} {s['p50_us']:9.1f} "
+                             f"{s['p90_us']:9.1f} {s['p99_us']:9.1f} {s['max_us']:9.1f} {s['total_ms']:9.1f}")
+        return "\n".join(lines)
+
+    def _path(self, name, suffix):
+        return os.path.join(self.out_dir, f"meshcom_{name}-{time.strftime('%Y%m%d-%H%M%S')}.{suffix}")
+
+    def dump(self):
+        """Tabelle ausgeben und als JSON ablegen (SIGUSR1)."""
+        print(self.summary())
+        path = self._path("stages", "json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=1)
+        print(f"Stufen: {path}")
+        return path
+
+    def toggle_sampling(self):
+        """Erster Aufruf startet das Sampling, der zweite stoppt es und schreibt die Datei (SIGUSR2)."""
+        if self._active is None:
+            if self.sampler == "stacks":
+                self._active = StackSampler(threading.get_ident())
+            else:
+                self._active = CProfileSampler()
+            self._active.start()
+            print(f"Sampling ({self.sampler}) laeuft, mit SIGUSR2 beenden")
+            return None
+        suffix = "txt" if self.sampler == "stacks" else "prof"
+        path = self._active.stop(self._path(self.sampler, suffix))
+        self._active = None
+        print(f"Sampling geschrieben: {path}")
+        return path
+
+    def install_signals(self, loop):
+        """Im Event Loop Thread aufrufen, dessen Stack wird auch gesampelt."""
+        loop.add_signal_handler(signal.SIGUSR1, self.dump)
+        loop.add_signal_handler(signal.SIGUSR2, self.toggle_sampling)
+        print(f"Profiling an: kill -USR1 {os.getpid()} (Stufen), kill -USR2 {os.getpid()} ({self.sampler})")
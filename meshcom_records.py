@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_records.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Ergebnis-Typen der Decoder aus meshcom_frames.py.
+    TextFrame   @: Text und @! Position
+    AckFrame    @A ACK
+    JsonEvent   D{...} vom Node per BLE, {...} per UDP oder seriell
+    DecodeError kaputter Frame, reason ist der Text, den es frueher als String gab
+    Alle Klassen haben __slots__, ein TextFrame braucht damit einen Bruchteil des Speichers eines dicts.
+    as_dict() und to_json() bauen erst dann etwas, wenn eine Ausgabe es braucht, print() zeigt dasselbe wie bisher.
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import json
+
+class Record:
+    __slots__ = ()
+    _fields = ()
+
+    def get(self, name, default=None):
+        """Wie dict.get, damit Code fuer die alten dicts weiter funktioniert."""
+        return getattr(self, name, default)
+
+    def as_dict(self):
+        result = {name: getattr(self, name) for name in self._fields}
+        rx_nodes = getattr(self, "rx_nodes", None)
+        if rx_nodes is not None:
+            result["rx_nodes"] = rx_nodes
+        return result
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), ensure_ascii=False)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+class TextFrame(Record):
+    """@: Text oder @! Position, Felder in der Reihenfolge von decode_binary_message."""
+
+    _fields = ("payload_type", "msg_id", "max_hop", "mesh_info", "message", "path", "dest",
+               "hardware_id", "lora_mod", "fcs", "fw", "lasthw", "fw_subver", "ending", "time_ms",
+               "fcs_ok", "dest_type")
+    __slots__ = _fields + ("rx_nodes",)
+
+    def __init__(self, payload_type, msg_id, max_hop, mesh_info, message, path, dest,
+                 hardware_id, lora_mod, fcs, fw, lasthw, fw_subver, ending, time_ms, fcs_ok, dest_type):
+        self.payload_type = payload_type
+        self.msg_id = msg_id
+        self.max_hop = max_hop
+        self.mesh_info = mesh_info
+        self.message = message
+        self.path = path
+        self.dest = dest
+        self.hardware_id = hardware_id
+        self.lora_mod = lora_mod
+        self.fcs = fcs
+        self.fw = fw
+        self.lasthw = lasthw
+        self.fw_subver = fw_subver
+        self.ending = ending
+        self.time_ms = time_ms
+        self.fcs_ok = fcs_ok
+        self.dest_type = dest_type
+        self.rx_nodes = None
+
+class AckFrame(Record):
+    _fields = ("payload_type", "msg_id", "max_hop", "mesh_info", "calced_fcs", "message", "ack_id")
+    __slots__ = _fields + ("rx_nodes",)
+
+    def __init__(self, payload_type, msg_id, max_hop, mesh_info, calced_fcs, message, ack_id):
+        self.payload_type = payload_type
+        self.msg_id = msg_id
+        self.max_hop = max_hop
+        self.mesh_info = mesh_info
+        self.calced_fcs = calced_fcs
+        self.message = message
+        self.ack_id = ack_id
+        self.rx_nodes = None
+
+class JsonEvent(Record):
+    """Geparstes JSON, to_json() liefert den Originaltext ohne neu zu serialisieren."""
+
+    __slots__ = ("data", "_frame", "_start", "_end")
+
+    def __init__(self, data, frame, start, end):
+        self.data = data
+        self._frame = frame
+        self._start = start
+        self._end = end
+
+    @property
+    def typ(self):
+        """TYP bei D{ Frames vom Node, type bei UDP Nachrichten."""
+        data = self.data
+        if not isinstance(data, dict):
+            return None
+        typ = data.get("TYP")
+        return typ if typ is not None else data.get("type")
+
+    def get(self, name, default=None):
+        return self.data.get(name, default) if isinstance(self.data, dict) else default
+
+    def as_dict(self):
+        return self.data
+
+    def to_json(self):
+        return bytes(self._frame[self._start:self._end]).decode("utf-8", errors="replace")
+
+    def __repr__(self):
+        return repr(self.data)
+
+class DecodeError(Record):
+    """Frame liess sich nicht dekodieren, str() ist der Grund."""
+
+    __slots__ = ("reason",)
+
+    def __init__(self, reason):
+        self.reason = reason
+
+    def as_dict(self):
+        return {"error": self.reason}
+
+    def __str__(self):
+        return self.reason
+
+    def __repr__(self):
+        return f"DecodeError({self.reason!r})"
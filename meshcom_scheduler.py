@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_scheduler.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Sendeplaner vor dem BLE write, damit weder der Node noch der LoRa Kanal geflutet wird.
+    - Prioritaetsqueue (heapq), innerhalb einer Prioritaet in Einreihungsreihenfolge
+    - Token Bucket in Sekunden Airtime, gefuellt mit dem Duty-Cycle (433 MHz ISM: 10%)
+    - Zusammenfassen: gleicher coalesce-Schluessel (z.B. Wetterbericht an Gruppe 20), nur der neueste geht raus
+    - Zaehler fuer Queue-Tiefe, Wartezeit, gesendet, verworfen, zusammengefasst
+
+    Die Airtime wird nach der Semtech Formel aus den LoRa Parametern geschaetzt,
+    Standard sind die MeshCom Einstellungen SF11, BW 250 kHz, CR 4/6.
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import heapq
+import itertools
+import math
+from time import monotonic
+
+PRIO_HIGH = 0    # Direktnachrichten, Antworten
+PRIO_NORMAL = 1  # Gruppennachrichten
+PRIO_LOW = 2     # Wetterberichte, Baken
+
+FRAME_OVERHEAD = 40 # Header, Path und Trailer, die der Node zur Nachricht dazupackt
+
+def lora_airtime(payload_len, sf=11, bw=250000, cr=6, preamble=8, crc=True, explicit_header=True):
+    """Airtime eines LoRa Pakets in Sekunden, cr=6 steht fuer 4/6."""
+    t_sym = (2 ** sf) / bw
+    low_dr = 1 if t_sym > 0.016 else 0
+    ih = 0 if explicit_header else 1
+    num = 8 * payload_len - 4 * sf + 28 + (16 if crc else 0) - 20 * ih
+    n_payload = 8 + max(math.ceil(num / (4 * (sf - 2 * low_dr))) * cr, 0)
+    return (preamble + 4.25) * t_sym + n_payload * t_sym
+
+class TokenBucket:
+    """Tokens sind Sekunden Airtime, rate = Duty-Cycle, capacity = erlaubter Burst."""
+
+    def __init__(self, rate=0.1, capacity=3.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def delay(self, cost):
+        """Sekunden bis cost verfuegbar ist, 0 wenn sofort."""
+        self._refill()
+        if self.tokens >= cost:
+            return 0.0
+        return (min(cost, self.capacity) - self.tokens) / self.rate
+
+    def take(self, cost):
+        self._refill()
+        self.tokens -= min(cost, self.capacity)
+
+class SchedulerStats:
+    def __init__(self):
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.airtime_total = 0.0
+
+    def as_dict(self, depth):
+        return {
+            "depth": depth,
+            "queued": self.queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "wait_avg": self.wait_total / self.sent if self.sent else 0.0,
+            "wait_max": self.wait_max,
+            "airtime_total": self.airtime_total,
+        }
+
+class OutboundScheduler:
+    """Sendeplaner fuer einen Node, send(data) ist z.B. BleSession.send_text."""
+
+    def __init__(self, send, bucket=None, max_depth=100, airtime=lora_airtime):
+        self.send = send
+        self.bucket = bucket or TokenBucket()
+        self.max_depth = max_depth
+        self.airtime = airtime
+        self.stats = SchedulerStats()
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = {}   # coalesce-Schluessel -> Eintrag
+        self._depth = 0
+        self._wakeup = asyncio.Event()
+
+    @property
+    def depth(self):
+        return self._depth
+
+    def submit(self, message, priority=PRIO_NORMAL, coalesce=None):
+        """Reiht eine Nachricht ein, gibt False zurueck wenn sie verworfen wurde."""
+        if coalesce is not None and coalesce in self._pending:
+            #alten Eintrag nur entwerten, der Heap wird beim Herausnehmen aufgeraeumt
+            old = self._pending.pop(coalesce)
+            old[3] = None
+            self._depth -= 1
+            self.stats.coalesced += 1
+
+        if self._depth >= self.max_depth:
+            if not self._drop_lowest(priority):
+                self.stats.dropped += 1
+                return False
+
+        entry = [priority, next(self._seq), monotonic(), message, coalesce]
+        heapq.heappush(self._heap, entry)
+        if coalesce is not None:
+            self._pending[coalesce] = entry
+        self._depth += 1
+        self.stats.queued += 1
+        self._wakeup.set()
+        return True
+
+    def _drop_lowest(self, priority):
+        """Platz schaffen, indem die juengste Nachricht mit schlechterer Prioritaet verworfen wird."""
+        victim = None
+        for entry in self._heap:
+            if entry[3] is not None and entry[0] > priority:
+                if victim is None or (entry[0], entry[1]) > (victim[0], victim[1]):
+                    victim = entry
+        if victim is None:
+            return False
+        victim[3] = None
+        if victim[4] is not None:
+            self._pending.pop(victim[4], None)
+        self._depth -= 1
+        self.stats.dropped += 1
+        return True
+
+    def _pop(self):
+        entry = heapq.heappop(self._heap)
+        if entry[4] is not None:
+            self._pending.pop(entry[4], None)
+        self._depth -= 1
+        return entry
+
+    async def run(self):
+        while True:
+            if not self._depth:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            #erst warten, dann herausnehmen, damit bis zuletzt zusammengefasst werden kann
+            while self._heap[0][3] is None:
+                heapq.heappop(self._heap)
+            head = self._heap[0]
+            cost = self.airtime(len(head[3].encode('utf-8')) + FRAME_OVERHEAD)
+            delay = self.bucket.delay(cost)
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            priority, seq, t_queued, message, coalesce = self._pop()
+            self.bucket.take(cost)
+
+            wait = monotonic() - t_queued
+            try:
+                await self.send(message)
+            except Exception as e:
+                self.stats.failed += 1
+                print(f"Senden fehlgeschlagen: {e}")
+                continue
+            self.stats.sent += 1
+            self.stats.wait_total += wait
+            self.stats.wait_max = max(self.stats.wait_max, wait)
+            self.stats.airtime_total += cost
+
+    def snapshot(self):
+        return self.stats.as_dict(self._depth)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_serial.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Async Leser fuer die USB-Seriell Schnittstelle des Nodes.
+    pyserial laeuft mit timeout=0, der Event Loop meldet ueber loop.add_reader wenn Daten da sind,
+    dann wird alles Verfuegbare in einem Stueck gelesen, kein Thread und kein readline mit Timeout.
+    LineSplitter zerlegt den Strom in Zeilen, ohne den Puffer bei jedem Stueck neu zu kopieren.
+    Verschwindet das Geraet (Node abgesteckt, Reset), wird mit Backoff neu geoeffnet.
+    Jede Zeile geht an feed(port, line), z.B. FramePipeline.feed, also in denselben Decoder wie BLE.
+
+    Selbsttest mit einem Pseudo-Terminal an Stelle des Nodes:
+    $ python3 meshcom_serial.py selftest
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+
+CHUNK_SIZE = 4096
+MAX_LINE = 4096  # laengere Zeilen sind Muell, z.B. falsche Baudrate
+
+class LineSplitter:
+    """Sammelt Stuecke und liefert fertige Zeilen ohne \\r\\n, leere Zeilen werden ausgelassen."""
+
+    def __init__(self, max_line=MAX_LINE):
+        self.max_line = max_line
+        self.buffer = bytearray()
+        self.overflows = 0
+        self._scan = 0  # bis hierhin ist sicher kein \n im Puffer
+
+    def feed(self, chunk):
+        buffer = self.buffer
+        buffer += chunk
+        lines = []
+        start = 0
+        pos = buffer.find(b"\n", self._scan)
+        while pos >= 0:
+            line = bytes(buffer[start:pos]).rstrip(b"\r")
+            if line:
+                lines.append(line)
+            start = pos + 1
+            pos = buffer.find(b"\n", start)
+        #einmal pro Stueck vorne abschneiden, nicht pro Zeile
+        if start:
+            del buffer[:start]
+        if len(buffer) > self.max_line:
+            buffer.clear()
+            self.overflows += 1
+        self._scan = len(buffer)
+        return lines
+
+class SerialReader:
+    """Liest bis close() von port und ruft feed(port, line) fuer jede Zeile auf."""
+
+    def __init__(self, feed, port="/dev/ttyACM0", baudrate=115200, min_backoff=1.0, max_backoff=30.0):
+        self.feed = feed
+        self.port = port
+        self.baudrate = baudrate
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.splitter = LineSplitter()
+        self.lines = 0
+        self.reconnects = 0
+        self.connected = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._lost = None
+
+    def _read_ready(self, ser):
+        try:
+            chunk = ser.read(CHUNK_SIZE)
+            if not chunk:
+                #lesbar, aber keine Daten: das Geraet ist weg (pyserial meldet das je nach Version auch als Exception)
+                raise OSError("device disconnected")
+        except Exception as e:
+            if not self._lost.done():
+                self._lost.set_result(e)
+            return
+        for line in self.splitter.feed(chunk):
+            self.lines += 1
+            self.feed(self.port, line)
+
+    async def _session(self):
+        import serial
+
+        loop = asyncio.get_running_loop()
+        ser = serial.Serial(self.port, self.baudrate, timeout=0)
+        self._lost = loop.create_future()
+        self.splitter = LineSplitter()  # halbe Zeile vom letzten Mal gehoert nicht dazu
+        loop.add_reader(ser.fileno(), self._read_ready, ser)
+        self.connected.set()
+        print(f"Seriell verbunden: {self.port}")
+        try:
+            closing = asyncio.ensure_future(self._closing.wait())
+            await asyncio.wait([self._lost, closing], return_when=asyncio.FIRST_COMPLETED)
+            closing.cancel()
+            if self._lost.done():
+                print(f"Seriell getrennt: {self.port}: {self._lost.result()}")
+        finally:
+            self.connected.clear()
+            loop.remove_reader(ser.fileno())
+            ser.close()
+
+    async def run(self):
+        import serial
+
+        attempt = 0
+        while not self._closing.is_set():
+            try:
+                await self._session()
+                attempt = 0
+            except (OSError, serial.SerialException) as e:
+                print(f"Seriell {self.port} nicht verfuegbar: {e}")
+            if self._closing.is_set():
+                break
+            self.reconnects += 1
+            delay = min(self.max_backoff, self.min_backoff * 2 ** attempt)
+            attempt += 1
+            try:
+                await asyncio.wait_for(self._closing.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        self._closing.set()
+
+async def selftest():
+    """Pseudo-Terminal als Node: Zeilen in zufaelligen Stuecken schreiben, das Geraet verschwinden lassen
+    und wieder anstecken. Der Leser oeffnet einen Symlink, so wie /dev/serial/by-id/..., der nach dem
+    Anstecken auf das neue Pseudo-Terminal zeigt."""
+    import os
+    import random
+    import tempfile
+
+    async def write(fd, data):
+        #nicht blockierend, ein volles Pseudo-Terminal wuerde sonst den Event Loop samt Leser anhalten
+        while data:
+            try:
+                data = data[os.write(fd, data):]
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "ttyMeshCom")
+    master, slave = os.openpty()
+    os.set_blocking(master, False)
+    os.symlink(os.ttyname(slave), path)
+    received = []
+    reader = SerialReader(lambda sender, line: received.append(line), path, min_backoff=0.05, max_backoff=0.2)
+    task = asyncio.create_task(reader.run())
+    await reader.connected.wait()
+
+    expected = [f'{{"type":"msg","src":"DK5EN-99","msg":"Zeile {i} {"x" * (i % 150)}"}}'.encode() for i in range(2000)]
+    stream = b"".join(line + b"\r\n" for line in expected)
+    pos = 0
+    while pos < len(stream):
+        size = random.randint(1, 700)
+        await write(master, stream[pos:pos + size])
+        pos += size
+        await asyncio.sleep(0)
+    while len(received) < len(expected):
+        await asyncio.sleep(0.01)
+    assert received == expected, "Zeilen weichen ab"
+    print(f"{len(received)} Zeilen korrekt zerlegt")
+
+    #Node abgesteckt: Master zu und Geraet weg, der Leser muss das merken und es neu versuchen
+    os.close(master)
+    os.close(slave)
+    os.unlink(path)
+    for _ in range(100):
+        if reader.reconnects > 1:
+            break
+        await asyncio.sleep(0.01)
+    assert reader.reconnects > 1, "Trennung nicht erkannt"
+    assert not reader.connected.is_set()
+    print(f"Trennung erkannt, Wiederverbindungsversuche: {reader.reconnects}")
+
+    #wieder angesteckt: neues Pseudo-Terminal unter demselben Namen, es muessen wieder Zeilen ankommen
+    master, slave = os.openpty()
+    os.set_blocking(master, False)
+    os.symlink(os.ttyname(slave), path)
+    await asyncio.wait_for(reader.connected.wait(), 5)
+    received.clear()
+    await write(master, b"".join(line + b"\r\n" for line in expected[:10]))
+    for _ in range(100):
+        if len(received) >= 10:
+            break
+        await asyncio.sleep(0.01)
+    assert received == expected[:10], "nach dem Wiederverbinden keine Zeilen"
+    print(f"Wiederverbunden nach {reader.reconnects} Versuchen, {len(received)} Zeilen empfangen")
+
+    await reader.close()
+    await task
+    os.close(master)
+    os.close(slave)
+    os.unlink(path)
+    os.rmdir(tmpdir)
+    print("Selbsttest ok")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MeshCom seriell lesen")
+    parser.add_argument("command", choices=["read", "selftest"])
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        asyncio.run(selftest())
+    else:
+        reader = SerialReader(lambda sender, line: print(line.decode("utf-8", errors="replace")), args.port, args.baudrate)
+        asyncio.run(reader.run())
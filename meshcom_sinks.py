@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_sinks.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Ausgaben fuer empfangene Frames statt print() pro Frame.
+    emit() legt den Frame nur in die begrenzte Queue jeder Ausgabe (ein deque append), formatiert und geschrieben
+    wird in einem eigenen Task, gesammelt bis batch_size Frames da sind oder flush_interval abgelaufen ist.
+    Ist eine Queue voll, wird je nach overflow der aelteste ("drop_oldest") oder der neue Frame ("drop_newest")
+    verworfen und gezaehlt. Eine langsame Ausgabe (Pipe, Platte, Netz) haelt so nie den BLE Empfang auf.
+
+      stdout   Text wie bisher, geschrieben im Thread, damit eine volle Pipe den Loop nicht blockiert
+      jsonl    eine JSON Zeile pro Frame mit rx_time und sender, geschrieben im Thread
+      udp      ein JSON Datagramm pro Frame an host:port (meshcom_udp.py)
+      broker   Unix Socket, jeder verbundene Client bekommt alle Frames als JSON Zeilen,
+               ein Client, der nicht mitliest, verliert Zeilen statt die anderen aufzuhalten
+
+    $ socat - UNIX-CONNECT:/tmp/meshcom-frames.sock     mitlesen beim broker
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+
+MAX_QUEUE = 10000
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.5  # Sekunden
+OVERFLOW = ("drop_oldest", "drop_newest")
+BROKER_PATH = os.environ.get("MESHCOM_BROKER", "/tmp/meshcom-frames.sock")
+BROKER_CLIENT_BUFFER = 256 * 1024  # Bytes, mehr haengt ein Client nicht hinterher
+
+def record_json(rx_time, sender, record):
+    """Eine JSON Zeile: rx_time, sender und die Felder des Records, Text ohne Record unter "text"."""
+    if isinstance(sender, tuple):
+        sender = f"{sender[0]}:{sender[1]}"
+    if hasattr(record, "as_dict"):
+        record = record.as_dict()
+    if isinstance(record, dict):
+        data = record
+    elif isinstance(record, list):
+        data = {"data": record}
+    else:
+        data = {"text": record if isinstance(record, str) else bytes(record).decode("utf-8", errors="replace")}
+    return json.dumps({"rx_time": rx_time, "sender": sender, **data}, ensure_ascii=False, separators=(",", ":"))
+
+class Sink:
+    """Basisklasse, Unterklassen schreiben in write_batch() eine Liste von (rx_time, sender, record)."""
+
+    name = "base"
+
+    def __init__(self, maxsize=MAX_QUEUE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 overflow="drop_oldest"):
+        if overflow not in OVERFLOW:
+            raise ValueError(f"Unbekannte overflow Regel: {overflow}, moeglich sind {', '.join(OVERFLOW)}")
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.queue = deque()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._full = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    def put(self, rx_time, sender, record):
+        """Blockiert nie, False wenn der Frame verworfen wurde."""
+        queue = self.queue
+        if len(queue) >= self.maxsize:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return False
+            queue.popleft()
+        queue.append((rx_time, sender, record))
+        if len(queue) >= self.batch_size:
+            self._full.set()
+        return True
+
+    async def write_batch(self, batch):
+        raise NotImplementedError
+
+    async def open(self):
+        pass
+
+    async def _flush(self):
+        while self.queue:
+            n = min(len(self.queue), self.batch_size)
+            batch = [self.queue.popleft() for _ in range(n)]
+            try:
+                await self.write_batch(batch)
+                self.written += n
+            except Exception as e:
+                #eine kaputte Ausgabe verliert den Batch, die anderen laufen weiter
+                self.errors += 1
+                print(f"Ausgabe {self.name}: {e}", file=sys.stderr)
+            self.batches += 1
+
+    async def run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self._flush()
+
+    async def start(self):
+        #Event neu, falls die Ausgabe schon in einem frueheren Event Loop lief
+        self._full = asyncio.Event()
+        self._closing = False
+        await self.open()
+        self._task = asyncio.create_task(self.run())
+
+    async def close(self):
+        """Schreibt was noch in der Queue ist und raeumt auf."""
+        if self._task is not None:
+            self._closing = True
+            self._full.set()
+            await self._task
+            self._task = None
+
+    def stats(self):
+        return {"queued": len(self.queue), "written": self.written, "dropped": self.dropped,
+                "batches": self.batches, "errors": self.errors}
+
+def format_text(sender, record):
+    return str(record)
+
+class StdoutSink(Sink):
+    """Text wie print(), fmt(sender, record) -> str."""
+
+    name = "stdout"
+
+    def __init__(self, fmt=format_text, stream=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+
+    def _write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    async def write_batch(self, batch):
+        fmt = self.fmt
+        text = "".join(fmt(sender, record) + "\n" for _, sender, record in batch)
+        await asyncio.to_thread(self._write, text)
+
+class JsonlSink(Sink):
+    name = "jsonl"
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._file = None
+
+    async def open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, text):
+        self._file.write(text)
+        self._file.flush()
+
+    async def write_batch(self, batch):
+        text = "".join(record_json(*item) + "\n" for item in batch)
+        await asyncio.to_thread(self._write, text)
+
+    async def close(self):
+        await super().close()
+        if self._file is not None:
+            self._file.close()
+
+class UdpSink(Sink):
+    """Leitet jeden Frame als JSON Datagramm weiter, z.B. an einen Logger oder ein zweites Gateway."""
+
+    name = "udp"
+
+    def __init__(self, host, port, **kwargs):
+        from meshcom_udp import UdpClient
+
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.client = UdpClient(port)
+
+    async def write_batch(self, batch):
+        await self.client.send_batch(self.host, [record_json(*item).encode("utf-8") for item in batch])
+
+    async def close(self):
+        await super().close()
+        await self.client.close()
+
+class BrokerSink(Sink):
+    """Lokaler Verteiler ueber einen Unix Socket, beliebig viele Leser, jeder bekommt jede Zeile."""
+
+    name = "broker"
+
+    def __init__(self, path=BROKER_PATH, client_buffer=BROKER_CLIENT_BUFFER, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.client_buffer = client_buffer
+        self.clients = set()
+        self.client_drops = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            #Clients schicken nichts, gelesen wird nur, um das Schliessen zu bemerken
+            while await reader.read(1024):
+                pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def open(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o660)
+
+    async def write_batch(self, batch):
+        if not self.clients:
+            return
+        data = "".join(record_json(*item) + "\n" for item in batch).encode("utf-8")
+        for writer in list(self.clients):
+            #kein drain(), ein haengender Client wuerde sonst alle aufhalten
+            if writer.transport.get_write_buffer_size() > self.client_buffer:
+                self.client_drops += len(batch)
+                continue
+            writer.write(data)
+
+    async def close(self):
+        await super().close()
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.clients):
+                writer.close()
+            await self.server.wait_closed()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def stats(self):
+        return {**super().stats(), "clients": len(self.clients), "client_drops": self.client_drops}
+
+SINKS = {
+    "stdout": StdoutSink,
+    "jsonl": JsonlSink,
+    "udp": UdpSink,
+    "broker": BrokerSink,
+}
+
+def make_sink(config):
+    """Baut eine Ausgabe aus einem Konfigurationseintrag {"type": ..., weitere Parameter}."""
+    config = dict(config)
+    kind = config.pop("type")
+    if kind not in SINKS:
+        raise ValueError(f"Unbekannte Ausgabe: {kind}, moeglich sind {', '.join(SINKS)}")
+    return SINKS[kind](**config)
+
+class SinkSet:
+    """Verteilt jeden Frame an alle Ausgaben, emit() ist fuer den Empfangspfad gedacht."""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    def add(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def emit(self, record, sender=None):
+        """record ist ein Record aus meshcom_records.py oder ein Text."""
+        rx_time = time.time()
+        for sink in self.sinks:
+            sink.put(rx_time, sender, record)
+
+    async def start(self):
+        for sink in self.sinks:
+            await sink.start()
+
+    async def close(self):
+        for sink in self.sinks:
+            await sink.close()
+
+    def stats(self):
+        return {sink.name: sink.stats() for sink in self.sinks}
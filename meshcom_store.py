@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_store.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Nachrichtenspeicher in SQLite (WAL Modus) fuer die dekodierten Binaerframes.
+    add() legt den Frame nur in eine Queue, ein eigener Thread schreibt gesammelt in einer Transaktion.
+    Damit wartet der BLE notification Pfad nie auf die SD-Karte.
+    Indizes auf msg_id, Ziel + Zeit, Absender + Zeit und Zeit, damit Abfragen wie
+    "die letzten 24h von Gruppe 20" auch bei Millionen Zeilen in Millisekunden zurueckkommen.
+
+    $ python3 meshcom_store.py mc.db --dest 20 --hours 24
+    $ python3 meshcom_store.py mc.db --sender DK5EN-99 --hours 1
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from meshcom_frames import sender_of
+from meshcom_records import TextFrame, AckFrame
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS station (
+    id INTEGER PRIMARY KEY,
+    callsign TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS message (
+    id INTEGER PRIMARY KEY,
+    msg_id INTEGER NOT NULL,
+    payload_type INTEGER NOT NULL,
+    sender_id INTEGER REFERENCES station(id),
+    path TEXT,
+    dest TEXT,
+    dest_type TEXT,
+    message TEXT,
+    hardware_id INTEGER,
+    fw INTEGER,
+    time_ms INTEGER,
+    rx_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS message_msg_id ON message(msg_id);
+CREATE INDEX IF NOT EXISTS message_dest_time ON message(dest, rx_time);
+CREATE INDEX IF NOT EXISTS message_sender_time ON message(sender_id, rx_time);
+CREATE INDEX IF NOT EXISTS message_time ON message(rx_time);
+"""
+
+INSERT = """INSERT INTO message
+    (msg_id, payload_type, sender_id, path, dest, dest_type, message, hardware_id, fw, time_ms, rx_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+def connect(path):
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")  # mit WAL sicher gegen Absturz, nur der letzte Commit kann fehlen
+    db.executescript(SCHEMA)
+    return db
+
+def query_recent(db, dest=None, sender=None, seconds=24 * 3600, limit=1000):
+    """Nachrichten der letzten seconds, optional nur an dest oder von sender, neueste zuerst."""
+    sql = ("SELECT m.rx_time, m.msg_id, s.callsign, m.path, m.dest, m.dest_type, m.message "
+           "FROM message m LEFT JOIN station s ON s.id = m.sender_id WHERE m.rx_time >= ?")
+    args = [time.time() - seconds]
+    if dest is not None:
+        sql += " AND m.dest = ?"
+        args.append(dest)
+    if sender is not None:
+        sql += " AND m.sender_id = (SELECT id FROM station WHERE callsign = ?)"
+        args.append(sender)
+    sql += " ORDER BY m.rx_time DESC LIMIT ?"
+    args.append(limit)
+    return db.execute(sql, args).fetchall()
+
+class MessageStore:
+    """Schreibt Frames aus einem Hintergrund-Thread, Abfragen laufen ueber eine eigene Verbindung."""
+
+    def __init__(self, path, batch_size=500, batch_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+        self._stations = {}
+        self._reader = connect(path)
+        self._writer = threading.Thread(target=self._run, name="meshcom-store", daemon=True)
+        self._writer.start()
+
+    def add(self, frame, rx_time=None):
+        """Nimmt dekodierte Binaerframes (TextFrame, AckFrame), alles andere wird ignoriert.
+        rx_time ist die Empfangszeit aus der Pipeline (FramePipeline.rx_time), ohne gilt die aktuelle Zeit."""
+        if isinstance(frame, (TextFrame, AckFrame)):
+            self._queue.put((frame, rx_time or time.time()))
+
+    def _station_id(self, db, callsign):
+        if callsign is None:
+            return None
+        station_id = self._stations.get(callsign)
+        if station_id is None:
+            db.execute("INSERT OR IGNORE INTO station (callsign) VALUES (?)", (callsign,))
+            station_id = db.execute("SELECT id FROM station WHERE callsign = ?", (callsign,)).fetchone()[0]
+            self._stations[callsign] = station_id
+        return station_id
+
+    def _row(self, db, frame, rx_time):
+        get = frame.get
+        path = get("path")
+        return (get("msg_id"), get("payload_type"), self._station_id(db, sender_of(path)), path,
+                get("dest"), get("dest_type"), get("message"), get("hardware_id"), get("fw"),
+                get("time_ms"), rx_time)
+
+    def _run(self):
+        db = connect(self.path)
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.batch_interval
+            #noch etwas sammeln, eine Transaktion fuer viele Zeilen
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if item is None:
+                stop = True
+            if batch:
+                with db:
+                    db.executemany(INSERT, [self._row(db, frame, rx_time) for frame, rx_time in batch])
+                self.written += len(batch)
+        db.close()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self._reader.close()
+
+    def recent(self, dest=None, sender=None, seconds=24 * 3600, limit=1000):
+        return query_recent(self._reader, dest, sender, seconds, limit)
+
+    def by_msg_id(self, msg_id):
+        return self._reader.execute("SELECT * FROM message WHERE msg_id = ?", (msg_id,)).fetchall()
+
+    async def recent_async(self, *args, **kwargs):
+        return await asyncio.to_thread(self.recent, *args, **kwargs)
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="MeshCom Nachrichten aus SQLite abfragen")
+    parser.add_argument("db")
+    parser.add_argument("--dest", help="Gruppe oder Rufzeichen, z.B. 20")
+    parser.add_argument("--sender", help="Rufzeichen des Absenders")
+    parser.add_argument("--hours", type=float, default=24)
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    start = time.perf_counter()
+    rows = query_recent(db, args.dest, args.sender, args.hours * 3600)
+    elapsed = time.perf_counter() - start
+    for rx_time, msg_id, sender, path, dest, dest_type, message in rows:
+        print(f"{datetime.fromtimestamp(rx_time):%Y-%m-%d %H:%M:%S} {msg_id:08X} {path}{dest} {message}")
+    print(f"{len(rows)} Nachrichten in {elapsed * 1000:.1f} ms")
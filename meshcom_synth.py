@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_synth.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Synthetische Frames, so wie der Node sie ueber BLE schickt, fuer Benchmarks und zum Ausprobieren
+    ohne Node: @: Text, @! Position, @A ACK mit <BIB Header, richtiger FCS und <BBBHBBBBI Trailer,
+    dazu D{ JSON Frames. Pfade, Gruppen und Texte (auch UTF-8) sind einstellbar, mit seed ist der Strom
+    jedes Mal derselbe. Ein Teil der Frames kommt ueber einen weiteren Hop ein zweites Mal (gleiche msg_id),
+    ACKs beziehen sich auf vorher erzeugte Textframes.
+
+    $ python3 meshcom_synth.py --count 10000 --capture synth.cap    abspielen mit meshcom_capture.py replay
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import json
+import random
+from meshcom_frames import HEADER, TRAILER, ACK_ID, calc_fcs
+
+CALLSIGNS = ("DK5EN-99", "OE1XAR-12", "OE3WAS-1", "OE1KBC-12", "DL1ABC-7", "DB0ABC-10", "OE5XYZ-3", "DL0XYZ-2")
+GROUPS = ("20", "232", "262", "9", "*")
+TEXTS = ("Hallo Gruppe, Test über BLE", "73 de DK5EN", "QSL?", "Wetter: 12.3°C, 55%, 1013 hPa",
+         "Grüße aus München 👋", "CQ CQ CQ", "Mesh läuft stabil seit 3 Tagen")
+MIX = {"text": 0.55, "position": 0.2, "ack": 0.1, "json": 0.15}  # Anteile im gemischten Strom
+HARDWARE = (43, 39, 3, 4, 10)  # Heltec v3, TLORA, ...
+
+def build_frame(payload_type, msg_id, body, max_hop=5, mesh_info=0, ack_id=0, hardware_id=43, time_ms=123456):
+    """Baut einen Binaerframe wie ihn der Node ueber BLE schickt, inklusive FCS."""
+    frame = bytearray(b'@')
+    frame += HEADER.pack(payload_type, msg_id, (mesh_info << 4) | max_hop)
+    frame += body.encode("utf-8")
+    # zero, hardware_id, lora_mod, fcs (Platzhalter), fw, lasthw, fw_subver, ending, time_ms
+    frame += TRAILER.pack(0, hardware_id, 3, 0, 34, 1, 0x76, 0xFE, time_ms)
+    frame += b'\x00'
+    if payload_type == ord('A'):
+        ACK_ID.pack_into(frame, len(frame) - 5, ack_id)
+    set_fcs(frame)
+    return bytes(frame)
+
+def set_fcs(frame):
+    """FCS in einem bytearray neu berechnen, z.B. nach Aendern des Hop Zaehlers."""
+    # calc_fcs liefert bereits vertauscht, im Frame steht es little-endian
+    frame[-11:-9] = calc_fcs(frame[1:-11]).to_bytes(2, 'little')
+
+def text_frame(path, dest, message, msg_id, **kwargs):
+    """path wie 'DK5EN-99,OE1XAR-12', dest Gruppe, '*' oder Rufzeichen."""
+    return build_frame(ord(':'), msg_id, f"{path}>{dest}:{message}", **kwargs)
+
+def aprs_position(lat, lon, symbol="#", comment=""):
+    """APRS Position '!4812.34N/01123.45E#...' aus Grad."""
+    lat_d, lon_d = abs(lat), abs(lon)
+    lat_s = f"{int(lat_d):02d}{(lat_d - int(lat_d)) * 60:05.2f}{'N' if lat >= 0 else 'S'}"
+    lon_s = f"{int(lon_d):03d}{(lon_d - int(lon_d)) * 60:05.2f}{'E' if lon >= 0 else 'W'}"
+    return f"!{lat_s}/{lon_s}{symbol}{comment}"
+
+def position_frame(path, lat, lon, msg_id, comment="/A=001700", **kwargs):
+    return build_frame(ord('!'), msg_id, f"{path}>*{aprs_position(lat, lon, comment=comment)}", **kwargs)
+
+def ack_frame(msg_id, ack_id, **kwargs):
+    return build_frame(ord('A'), msg_id, "", ack_id=ack_id, **kwargs)
+
+def json_frame(typ, **fields):
+    """D{"TYP":...} mit 0x00 am Ende, kompakt wie vom Node."""
+    data = {"TYP": typ, **fields}
+    return b'D' + json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b'\x00'
+
+class FrameGenerator:
+    """Reproduzierbarer Strom gemischter Frames, frames(n) liefert bytes."""
+
+    def __init__(self, seed=1, callsigns=CALLSIGNS, groups=GROUPS, texts=TEXTS, mix=MIX, max_hops=3,
+                 dup_ratio=0.2):
+        self.rng = random.Random(seed)
+        self.callsigns = callsigns
+        self.groups = groups
+        self.texts = texts
+        self.kinds = list(mix)
+        self.weights = [mix[k] for k in self.kinds]
+        self.max_hops = max_hops
+        self.dup_ratio = dup_ratio  # Anteil der Frames, die ueber einen weiteren Hop nochmal kommen
+        self.msg_id = self.rng.getrandbits(32)
+        self.recent_text = []       # msg_ids fuer ACKs
+
+    def _next_id(self):
+        self.msg_id = (self.msg_id + self.rng.randint(1, 64)) & 0xFFFFFFFF
+        return self.msg_id
+
+    def path(self):
+        rng = self.rng
+        hops = rng.sample(self.callsigns, rng.randint(1, self.max_hops + 1))
+        return ",".join(hops)
+
+    def text(self):
+        rng = self.rng
+        dest = rng.choice(self.groups) if rng.random() < 0.8 else rng.choice(self.callsigns)
+        msg_id = self._next_id()
+        self.recent_text = (self.recent_text + [msg_id])[-32:]
+        return text_frame(self.path(), dest, rng.choice(self.texts), msg_id,
+                          hardware_id=rng.choice(HARDWARE), time_ms=rng.getrandbits(32))
+
+    def position(self):
+        rng = self.rng
+        return position_frame(self.path(), rng.uniform(46.0, 55.0), rng.uniform(5.0, 17.0), self._next_id(),
+                              hardware_id=rng.choice(HARDWARE), time_ms=rng.getrandbits(32))
+
+    def ack(self):
+        rng = self.rng
+        ack_id = rng.choice(self.recent_text) if self.recent_text else self._next_id()
+        return ack_frame(self._next_id(), ack_id)
+
+    def json(self):
+        rng = self.rng
+        typ = rng.choice(("MH", "MH", "MH", "G", "W", "I"))
+        if typ == "MH":
+            return json_frame("MH", CALL=rng.choice(self.callsigns), HW=rng.choice(HARDWARE), MOD=3, RT=1, RC=0,
+                              DI=-1, PL=0, RSSI=rng.randint(-125, -60), SNR=rng.randint(-15, 12),
+                              DATE="2025-03-24 21:26:00")
+        if typ == "G":
+            return json_frame("G", LAT=round(rng.uniform(46, 55), 4), LON=round(rng.uniform(5, 17), 4),
+                              ALT=rng.randint(0, 2000), SAT=rng.randint(0, 12), SFIX=True, HDOP=1,
+                              RATE=1200, NEXT=1166, DIST=0, DIRn=0, DIRo=0, DATE="2025-03-24 21:26:00")
+        if typ == "W":
+            return json_frame("W", TEMP=round(rng.uniform(-10, 35), 1), TOUT=0, HUM=rng.randint(20, 99),
+                              PRES=round(rng.uniform(980, 1040), 1), QNH=1016.4, ALT=520, GAS=0, CO2=0)
+        return json_frame("I", FWVER="4.34", FWSUB="v", CALL=rng.choice(self.callsigns), ID=rng.getrandbits(31),
+                          HWID=43, MAXV=4.24, ATXT="", BLE="short", BATP=rng.randint(0, 100), BATV=4.12,
+                          GCB=[0, 0, 0, 0, 0, 0], CTRY="EU", BOOST=False)
+
+    def duplicate(self, frame):
+        """Gleicher Frame (gleiche msg_id) mit anderem Hop Zaehler, so wie ihn ein Repeater weitergibt."""
+        frame = bytearray(frame)
+        frame[6] = (frame[6] & 0xF0) | max(0, (frame[6] & 0x0F) - 1)
+        set_fcs(frame)
+        return bytes(frame)
+
+    def frames(self, n):
+        rng = self.rng
+        makers = {"text": self.text, "position": self.position, "ack": self.ack, "json": self.json}
+        last = None
+        for _ in range(n):
+            if last is not None and rng.random() < self.dup_ratio:
+                frame = self.duplicate(last)
+                last = None
+            else:
+                frame = makers[rng.choices(self.kinds, self.weights)[0]]()
+                last = frame if frame[0] == 0x40 else None
+            yield frame
+
+def sample_frames(n=10000, seed=1, **kwargs):
+    return list(FrameGenerator(seed, **kwargs).frames(n))
+
+if __name__ == "__main__":
+    import argparse
+    from meshcom_frames import decode_frame
+
+    parser = argparse.ArgumentParser(description="Synthetische MeshCom Frames erzeugen")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--capture", help="als Mitschnitt schreiben (meshcom_capture.py), sonst dekodiert ausgeben")
+    args = parser.parse_args()
+
+    frames = FrameGenerator(args.seed).frames(args.count)
+    if args.capture:
+        from meshcom_capture import CaptureWriter
+
+        writer = CaptureWriter(args.capture)
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+        print(f"{writer.frames} Frames nach {args.capture}")
+    else:
+        for frame in frames:
+            print(decode_frame(frame))
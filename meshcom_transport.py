@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_transport.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Gemeinsame async Schnittstelle fuer die drei Wege zum Node: BLE, UDP (--extudp) und Seriell.
+    Jeder Transport ruft fuer jeden empfangenen Frame feed(sender, data) auf, z.B. FramePipeline.feed,
+    damit landen alle Eingaenge im selben Decoder, Duplikatfilter und Speicher.
+    Welcher Transport laeuft, steht in der Konfiguration, siehe make_transport().
+
+    {"type": "ble",    "address": "48:CA:43:3A:83:AD"}
+    {"type": "udp",    "host": "0.0.0.0", "port": 1799}
+    {"type": "serial", "port": "/dev/ttyACM0", "baudrate": 115200}
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+
+class Transport:
+    """Basisklasse, run() laeuft bis close() oder cancel."""
+
+    name = "base"
+
+    def __init__(self, feed):
+        self.feed = feed
+
+    async def run(self):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class BleTransport(Transport):
+    name = "ble"
+
+    def __init__(self, feed, address, **session_args):
+        from meshcom_ble import BleSession
+
+        super().__init__(feed)
+        self.address = address
+        self.session = BleSession(address, on_notify=self._on_notify, **session_args)
+
+    def _on_notify(self, characteristic, data):
+        #Absender ist der Node, nicht die Characteristic, sonst sind mehrere Nodes nicht zu unterscheiden
+        self.feed(self.address, data)
+
+    async def run(self):
+        await self.session.run()
+
+    async def close(self):
+        await self.session.close()
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, feed):
+        self.feed = feed
+
+    def datagram_received(self, data, addr):
+        self.feed(addr, data)
+
+class UdpTransport(Transport):
+    """Empfaengt die JSON Datagramme, die der Node mit --extudp schickt."""
+
+    name = "udp"
+
+    def __init__(self, feed, host="0.0.0.0", port=1799):
+        super().__init__(feed)
+        self.host = host
+        self.port = port
+        self.transport = None
+        self._closed = asyncio.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpProtocol(self.feed), local_addr=(self.host, self.port))
+        try:
+            await self._closed.wait()
+        finally:
+            self.transport.close()
+
+    async def close(self):
+        self._closed.set()
+
+class SerialTransport(Transport):
+    """Zeilen von der USB-Seriell Konsole des Nodes, siehe meshcom_serial.py."""
+
+    name = "serial"
+
+    def __init__(self, feed, port="/dev/ttyACM0", baudrate=115200):
+        from meshcom_serial import SerialReader
+
+        super().__init__(feed)
+        self.port = port
+        self.reader = SerialReader(feed, port, baudrate)
+
+    async def run(self):
+        await self.reader.run()
+
+    async def close(self):
+        await self.reader.close()
+
+TRANSPORTS = {
+    "ble": BleTransport,
+    "udp": UdpTransport,
+    "serial": SerialTransport,
+}
+
+def make_transport(config, feed):
+    """Baut einen Transport aus einem Konfigurationseintrag {"type": ..., weitere Parameter}."""
+    config = dict(config)
+    kind = config.pop("type")
+    if kind not in TRANSPORTS:
+        raise ValueError(f"Unbekannter Transport: {kind}, moeglich sind {', '.join(TRANSPORTS)}")
+    return TRANSPORTS[kind](feed, **config)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script Name: meshcom_udp.py
+Author: Martin Stefan Werner
+CallSign: DK5EN
+Where to find: https://www.qrz.com/db/DK5EN
+Date: 2026-10-18
+
+Description: Async UDP Client zum Senden an MeshCom Nodes mit --extudp.
+    Pro Node bleibt ein Socket offen, statt fuer jede Nachricht einen neuen aufzumachen.
+    Hostnamen wie dk5en-99.local werden ueber loop.getaddrinfo aufgeloest und ttl Sekunden gemerkt,
+    ein abgelaufener Eintrag wird weiter benutzt und im Hintergrund erneuert, mDNS haelt also nie das Senden auf.
+    send_batch schickt viele Nachrichten mit einer einzigen Aufloesung raus.
+
+    async with UdpClient() as client:
+        await client.send_message("dk5en-99.local", "TEST", "Hallo")
+"""
+"""
+License:
+This work is licensed under the Creative Commons Attribution-ShareAlike 4.0 International License.
+To view a copy of this license, visit https://creativecommons.org/licenses/by-sa/4.0/ or send a letter to
+Creative Commons, PO Box 1866, Mountain View, CA 94042, USA.
+
+Copyright (c) 2025 Martin S. Werner
+"""
+import asyncio
+import json
+import socket
+from time import monotonic
+
+MC_PORT = 1799  # Standard Port fuer MC
+DNS_TTL = 300.0  # Sekunden
+
+def udp_message(dst, msg):
+    """Nachricht im Format des Nodes: {"type":"msg","dst":...,"msg":...}, Anfuehrungszeichen im Text sind escaped."""
+    return json.dumps({"type": "msg", "dst": dst, "msg": msg}, ensure_ascii=False, separators=(",", ":")).encode()
+
+class DnsCache:
+    """Hostname -> IP mit TTL, Erneuerung im Hintergrund."""
+
+    def __init__(self, ttl=DNS_TTL):
+        self.ttl = ttl
+        self.lookups = 0
+        self._entries = {}   # host -> (ip, Zeitpunkt der Aufloesung)
+        self._refresh = {}   # host -> laufender Task
+
+    async def _lookup(self, host):
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+        self.lookups += 1
+        ip = infos[0][4][0]
+        self._entries[host] = (ip, monotonic())
+        return ip
+
+    async def _background(self, host):
+        try:
+            await self._lookup(host)
+        except OSError as e:
+            #alte Adresse bleibt, beim naechsten Senden wird es noch mal versucht
+            print(f"DNS Erneuerung fuer {host} fehlgeschlagen: {e}")
+        finally:
+            del self._refresh[host]
+
+    async def resolve(self, host):
+        entry = self._entries.get(host)
+        if entry is None:
+            return await self._lookup(host)
+        ip, t_resolved = entry
+        if monotonic() - t_resolved > self.ttl and host not in self._refresh:
+            self._refresh[host] = asyncio.create_task(self._background(host))
+        return ip
+
+    async def close(self):
+        for task in list(self._refresh.values()):
+            task.cancel()
+        await asyncio.gather(*self._refresh.values(), return_exceptions=True)
+
+class UdpClient:
+    """Ein offener Socket pro Node, Adressen aus dem DnsCache."""
+
+    def __init__(self, port=MC_PORT, ttl=DNS_TTL):
+        self.port = port
+        self.dns = DnsCache(ttl)
+        self.sent = 0
+        self._transports = {}  # host -> DatagramTransport
+
+    async def _transport(self, host):
+        transport = self._transports.get(host)
+        if transport is None or transport.is_closing():
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, family=socket.AF_INET)
+            self._transports[host] = transport
+        return transport
+
+    async def send_batch(self, host, payloads, port=None):
+        """Schickt alle payloads (bytes oder str) an host, aufgeloest wird nur einmal."""
+        ip = await self.dns.resolve(host)
+        transport = await self._transport(host)
+        addr = (ip, port or self.port)
+        count = 0
+        for payload in payloads:
+            if isinstance(payload, str):
+                payload = payload.encode()
+            transport.sendto(payload, addr)
+            count += 1
+            if count % 64 == 0:
+                #dem Loop Luft lassen, damit bei grossen Batches andere Tasks drankommen
+                await asyncio.sleep(0)
+        self.sent += count
+        return count
+
+    async def send(self, host, payload, port=None):
+        return await self.send_batch(host, (payload,), port)
+
+    async def send_message(self, host, dst, msg, port=None):
+        return await self.send(host, udp_message(dst, msg), port)
+
+    async def close(self):
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+        await self.dns.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -20,6 +20,11 @@ There are reprequistes to be met, otherwise the script will fail:
         With insights from: https://srv08.oevsv.at/meshcom/#
 
 This is an educational script, that helps to understand of how to communicate to a MeshCom Node.
+
+Viele Nodes auf einem Listener: mit --ingest wird in Batches empfangen und das JSON im Worker geparst,
+am Ende gibt es Pakete und Bytes pro Absender, siehe meshcom_ingest.py
+Mit MESHCOM_METRICS_PORT gibt es die Datagramme pro Absender laufend im Prometheus Format (meshcom_metrics.py).
+        $ python3 readudp.py --ingest
 """
 """        
 License:
@@ -42,19 +47,48 @@ This script is provided "as is", without warranty of any kind, express or implie
 """
 # Code starts here
 import asyncio
+import json
+import os
 import sys
 import signal
+from meshcom_sinks import SinkSet, StdoutSink
 
 ip = "0.0.0.0"
 port = 1799 #	 RX TX Port
 #port = 1798 #	 stadard Port für MC
 
-async def read_udp_message(ip_address: str, port: int):
+def format_udp(sender, message):
+    return f"Empfangen von {sender}: {message}"
+
+#formatiert und geschrieben wird gesammelt im eigenen Task, eine volle Pipe haelt den Empfang nicht auf
+output = SinkSet([StdoutSink(format_udp)])
+
+def print_batch(batch):
+    for addr, data, decoded in batch:
+        output.emit(decoded if decoded is not None else data.decode('utf-8', errors='replace'), addr)
+
+async def read_udp_message(ip_address: str, port: int, ingest_mode=False):
     loop = asyncio.get_running_loop()
-    transport, _ = await loop.create_datagram_endpoint(
-        lambda: UDPServerProtocol(),
-        local_addr=(ip_address, port)
-    )
+    await output.start()
+    if ingest_mode:
+        from meshcom_ingest import UdpIngest
+
+        ingest = UdpIngest(print_batch, ip_address, port)
+        ingest.open()
+        print("UDP-Server gestartet und lauscht (ingest)...")
+        metrics_server = None
+        if os.environ.get("MESHCOM_METRICS_PORT"):
+            from meshcom_metrics import MetricsRegistry, MetricsServer, register_ingest
+
+            registry = MetricsRegistry()
+            register_ingest(registry, ingest)
+            metrics_server = MetricsServer(registry, port=int(os.environ["MESHCOM_METRICS_PORT"]))
+            await metrics_server.start()
+    else:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: UDPServerProtocol(),
+            local_addr=(ip_address, port)
+        )
 
     stop_event = asyncio.Event()
     async def check_for_exit():
@@ -73,7 +107,14 @@ async def read_udp_message(ip_address: str, port: int):
 
     loop.add_signal_handler(signal.SIGINT, stop_loop)  # Fängt Strg+C ab
     await stop_event.wait()  # Warten, bis Strg+C gedrückt wird
-    transport.close()
+    if ingest_mode:
+        await ingest.close()
+        if metrics_server is not None:
+            await metrics_server.close()
+        print(json.dumps(ingest.stats(), indent=2))
+    else:
+        transport.close()
+    await output.close()
 
 class UDPServerProtocol:
     def connection_made(self, transport):
@@ -81,19 +122,24 @@ class UDPServerProtocol:
         print("UDP-Server gestartet und lauscht...")
 
     def datagram_received(self, data, addr):
-        message = data.decode("utf-8", errors="replace")  
-        print(f"Empfangen von {addr}: {message}")
+        output.emit(data.decode("utf-8", errors="replace"), addr)
 
     def connection_lost(self, exc):
         print("Verbindung verloren, UDP-Listener wird beendet.")
 
 if __name__ == "__main__":
 
+    ingest_mode = "--ingest" in sys.argv[1:]
+    if ingest_mode:
+        from meshcom_ingest import install_uvloop
+        if install_uvloop():
+            print("uvloop aktiv")
+
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     
     try:
-        loop.run_until_complete(read_udp_message(ip, port))
+        loop.run_until_complete(read_udp_message(ip, port, ingest_mode))
     except KeyboardInterrupt:
         print("UDP-Listener durch KeyboardInterrupt beendet.")
     finally:
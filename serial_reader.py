@@ -1,8 +1,31 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import serial
+import asyncio
+from meshcom_pipeline import FramePipeline
+from meshcom_serial import SerialReader
+from meshcom_records import JsonEvent
+from meshcom_sinks import SinkSet, StdoutSink
 
-ser = serial.Serial('/dev/ttyACM0', 115200, timeout=1)
-while True:
-    line = ser.readline().decode('utf-8').strip()  # Read a line, strip newline
-    print(line + '\r')  # Add carriage return
+sinks = SinkSet([StdoutSink()])
+
+def output(sender, line, decoded):
+    # JSON Zeilen dekodiert, alles andere wie bisher als Text
+    if isinstance(decoded, JsonEvent):
+        sinks.emit(decoded, sender)
+    else:
+        sinks.emit(line.decode('utf-8', errors='replace') + '\r', sender)  # Add carriage return
+
+async def main(port='/dev/ttyACM0', baudrate=115200):
+    # liest in Stuecken per Event Loop, verbindet neu wenn der Node weg war
+    await sinks.start()
+    pipeline = FramePipeline(output)
+    pipeline.start()
+    reader = SerialReader(pipeline.feed, port, baudrate)
+    try:
+        await reader.run()
+    finally:
+        await pipeline.stop(drain=False)
+        await sinks.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())